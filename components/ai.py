@@ -3,7 +3,11 @@ from dataclasses import dataclass, field
 from components.events import GameEvent
 from world.rules import capitalize
 from typeclasses.objects import Object
-from evennia.utils import search, delay
+from components.owner import OwnerRef, find_object
+from world.scheduler import AI_SCHEDULER, players_near
+from world.occupancy import OCCUPANCY
+from world.graph import ROOM_GRAPH
+from world.aipool import AI_POOL
 import random
 from collections import deque
 
@@ -17,6 +21,14 @@ DEFAULT_TARGET_MESSAGE = "{owner} sets their sights on {target}."
 DEFAULT_STALK_MESSAGE = "{owner} tracks {target} to an adjacent room."
 DEFAULT_DEAD_MESSAGE = "{owner} stews silently in non-existence."
 
+DEFAULT_MESSAGES = {
+    "think": DEFAULT_THINK_MESSAGE,
+    "patrol": DEFAULT_PATROL_MESSAGE,
+    "target": DEFAULT_TARGET_MESSAGE,
+    "stalk": DEFAULT_STALK_MESSAGE,
+    "dead": DEFAULT_DEAD_MESSAGE,
+}
+
 
 class BaseBehavior:
     """
@@ -96,10 +108,20 @@ class BaseBrain:
     Attrs:
         handler:    This brain's handler
         granted_behaviors:  The list of behaviors this brain grants
+        wake_range: How many exits away a player must be for this brain to keep thinking.
+                    With no player in range and nothing queued, the owner goes dormant.
+                    None to always think
+        evaluator:  (optional) The python path of a function which decides what to do
+                    from a world snapshot, in a worker process; see `world.snapshots`.
+                    Used instead of `at_think` when the AI process pool is running
+        snapshot_fields:    The optional snapshot fields the evaluator needs
     """
 
     handler: object
     granted_behaviors: list[BaseBehavior] = []
+    wake_range: int = 2
+    evaluator: str = None
+    snapshot_fields: tuple = ()
 
     def __init__(self, handler=None) -> None:
         self.handler = handler
@@ -140,6 +162,14 @@ class BaseBrain:
         """Hook method for thinking; when the AI has nothing in queue, it thinks."""
         pass
 
+    def at_evaluate(self, decision, *args, **kwargs):
+        """Hook method for acting on the decision returned by this brain's evaluator.
+        Called on the main thread, in place of `at_think`.
+
+        Args:
+            decision:   Whatever the evaluator returned"""
+        pass
+
     def scan(self, target=None, location=None):
         """
         Find all potential targets.
@@ -157,11 +187,8 @@ class BaseBrain:
         place = location if location else self.owner.location
 
         # get list of targets and target to find
-        targets = {
-            obj
-            for obj in place.contents_get(exclude=self.owner)
-            if obj.has_account and not obj.is_superuser
-        }
+        targets = OCCUPANCY.targets(place)
+        targets.discard(self.owner)
         target = set([target]) if target else set([])
 
         # find target via set intersection
@@ -176,8 +203,7 @@ class BaseBrain:
         Find all valid exits to the current location.
         """
         here = self.owner.location
-        exits = [exi for exi in here.exits if exi.access(self, "traverse")]
-        return exits
+        return ROOM_GRAPH.passable(here, self.owner)
 
     def search(self, target=None):
         """
@@ -251,9 +277,13 @@ class BehaviorMove(BaseBehavior):
 
 
 class PatrolBrain(BaseBrain):
-    """Brain for patrolling enemies"""
+    """Brain for patrolling enemies. Hunts targets up to `search_range` exits away."""
 
     target = None
+    search_range: int = 3
+    wake_range: int = 3
+    evaluator = "world.snapshots.patrol"
+    snapshot_fields = ("occupancy", "exits")
 
     def at_think(self, *args, **kwargs):
         owner = self.owner
@@ -269,9 +299,8 @@ class PatrolBrain(BaseBrain):
             # did not find any targets in current room
             if not found:
                 destination = self.search(self.target)
-                # found either existing or new targets in nearby room, stalk
+                # found either existing or new targets nearby, stalk
                 if destination:
-                    self.target = self.scan(self.target, destination)[0]
                     message = messaging.get("stalk", DEFAULT_STALK_MESSAGE)
                     self.target.msg("You feel eyes on your back...")
                     self.queue(BehaviorMove, **{"destination": destination})
@@ -294,6 +323,30 @@ class PatrolBrain(BaseBrain):
         formatted = capitalize(message.format(**mapping))
         place.msg_contents(formatted)
 
+    def at_evaluate(self, decision: dict, *args, **kwargs):
+        """Queues the behavior decided by `world.snapshots.patrol`."""
+        owner = self.owner
+        place = owner.location
+        messaging: dict = owner.attributes.get("messaging", {})
+        key = decision.get("message", "think")
+        target = find_object(decision.get("target"))
+        behavior = decision.get("behavior")
+
+        if behavior == "attack" and target:
+            self.target = target
+            self.queue(BehaviorAttack, **{"target": target})
+        elif behavior == "move":
+            self.target = target
+            destination = find_object(decision.get("destination")) or owner.home
+            if target and key == "stalk":
+                target.msg("You feel eyes on your back...")
+            self.queue(BehaviorMove, **{"destination": destination})
+
+        # send ye message
+        message = messaging.get(key, DEFAULT_MESSAGES.get(key, DEFAULT_THINK_MESSAGE))
+        mapping = {"owner": owner, "target": self.target}
+        place.msg_contents(capitalize(message.format(**mapping)))
+
     def scan(self, target=None, location=None):
         """
         Find all potential targets.
@@ -311,13 +364,8 @@ class PatrolBrain(BaseBrain):
         place = location if location else self.owner.location
 
         # get list of targets and target to find
-        targets = {
-            obj
-            for obj in place.contents_get(exclude=self.owner)
-            if obj.has_account
-            if not obj.is_superuser
-            if not obj.tags.has("dead", category="combat")
-        }
+        targets = OCCUPANCY.targets(place)
+        targets.discard(self.owner)
         target = set([target]) if target else set([])
 
         # find target via set intersection
@@ -332,26 +380,36 @@ class PatrolBrain(BaseBrain):
         Find all valid exits to the current location.
         """
         here = self.owner.location
-        exits = [exi for exi in here.exits if exi.access(self, "traverse")]
-        return exits
+        return ROOM_GRAPH.passable(here, self.owner)
 
     def search(self, target=None):
         """
-        Searches nearby rooms for specified target.
+        Searches rooms up to `search_range` exits away for the specified target, or the
+        closest target if it can't be found, and sets it as this brain's target.
 
         Args:
-            target: (optional) The target to search for. If none, returns destination of first target found
+            target: (optional) The target to search for. If none, finds the closest target
+
+        Returns the next room on the way to the target, or None if no target was found
         """
-        dest = None
-        exits = self.find_exits()
+        here = self.owner.location
+        occupied = [roomid for roomid in OCCUPANCY.rooms if roomid != here.id]
+        if not occupied:
+            return None
 
-        for exi in exits:
-            targets = self.scan(target, exi.destination)
-            if targets:
-                self.target = targets[0]
-                dest = exi.destination
-                break
-        return dest
+        # the existing target if it's reachable, otherwise the closest one
+        found = None
+        current = OCCUPANCY.locate(target) if target else None
+        if current in occupied:
+            found = ROOM_GRAPH.nearest(here, [current], self.owner, self.search_range)
+        if not found:
+            found = ROOM_GRAPH.nearest(here, occupied, self.owner, self.search_range)
+        if not found:
+            return None
+
+        room, _, exi = found
+        self.target = self.scan(target, room)[0]
+        return exi.destination
 
     def patrol(self):
         """
@@ -376,14 +434,27 @@ class BrainHandler:
     """
     The handler for "brains", AI modules that can be swapped out by builders which grant
     particular behaviors and custom
+
+    The brain and behavior instances live as long as the handler. They are rebuilt when
+    `swap_brain` runs, or when the owner's "brain" or "behaviors" attributes change.
+
+    Attrs:
+        queue:      The queue of behavior instances to act on
+        reactions:  Behavior instances with triggers, by trigger
     """
 
     ownerref = None
-    brain: BaseBrain = None
+    _owner: OwnerRef = None
     queue: deque = None
+    _brain: BaseBrain = None
+    _brainsource = None
+    _behaviors: list = None
+    _behaviorsource = None
+    _reactions: dict = None
 
     def __init__(self, owner) -> None:
         self.ownerref = owner.dbref
+        self._owner = OwnerRef(owner)
         self.queue = deque([])
         # start thinking
         self.act()
@@ -391,22 +462,34 @@ class BrainHandler:
     @property
     def owner(self):
         """The object this handler is attached to."""
-        if self.ownerref:
-            _owner = search.search_object(self.ownerref)
-        if _owner:
-            return _owner[0]
-        else:
-            return None
+        return self._owner()
+
+    @property
+    def brain(self) -> BaseBrain:
+        """The brain instance, from the owner's "brain" attribute (TestBrain by default)."""
+        source = self._source("brain")
+        if self._brain is None or source is not self._brainsource:
+            brain = self.owner.attributes.get("brain", TestBrain)
+            if not isinstance(brain, BaseBrain):
+                brain = brain(self)
+            if not brain.handler:
+                brain.handler = self
+            self._brain, self._brainsource = brain, source
+            self._behaviors = None
+        return self._brain
 
     @property
-    def behaviors(self):
+    def behaviors(self) -> list[BaseBehavior]:
         """A list of instantiated behaviors for use by the handler, combining
         behaviors granted by the database and by the attached brain."""
-        behaviorsdb = self.owner.attributes.get("behaviors", default=[])
-        behaviorsbrain = self.brain.granted_behaviors if self.brain else []
-        uniquebehaviors = list(set(behaviorsdb + behaviorsbrain))
-        _return = [behavior(self.owner, self) for behavior in uniquebehaviors]
-        return _return
+        self._refresh()
+        return self._behaviors
+
+    @property
+    def reactions(self) -> dict:
+        """Behavior instances with triggers, by trigger. Rebuilt along with `behaviors`."""
+        self._refresh()
+        return self._reactions
 
     def act(self, idle=5, *args, **kwargs):
         """
@@ -415,22 +498,21 @@ class BrainHandler:
         Args:
             idle:   (default: 5) The number of seconds to wait after thinking before thinking again
         """
-        # oops check
-        brain = self.owner.attributes.get("brain", TestBrain)
-
-        # initialize the brain and queue
-        if not isinstance(brain, BaseBrain):
-            brain = brain(self)
-
         place = self.owner.location
         thinking: Cooldown = self.owner.cooldowns.get("think")
         if thinking:
+            # already scheduled; but after a reload, resume when the thought is done
+            if not AI_SCHEDULER.has(self.owner):
+                AI_SCHEDULER.schedule(self.owner, thinking.timeleft)
             return
 
-        if not brain.handler:
-            brain.handler = self
+        brain = self.brain
 
-        self.brain = brain
+        # nothing to do and nobody to do it to; sleep until a player comes near
+        if not self.queue and brain.wake_range is not None and place:
+            if not players_near(place, brain.wake_range):
+                AI_SCHEDULER.sleep(self.owner)
+                return
 
         # think if the queue is empty, otherwise get frontmost behavior instance
         brain.pre_think(**kwargs)
@@ -439,7 +521,9 @@ class BrainHandler:
         messaging: dict = self.owner.attributes.get("messaging", {})
 
         if not self.queue:
-            self.think(**kwargs)
+            # evaluated in a worker process if the brain can be, otherwise thought here
+            if not AI_POOL.submit(self):
+                self.think(**kwargs)
             self.owner.cooldowns.add("think", idle)
         elif not self.owner.tags.has("dead", "combat"):
             # behavior instance
@@ -456,8 +540,8 @@ class BrainHandler:
                 instance.at_act(**kwargs)
                 self.queue.popleft()
 
-        # keep this thread going
-        delay(_delay, act_thread, self.owner)
+        # wake up again
+        AI_SCHEDULER.schedule(self.owner, _delay)
 
     def think(self, *args, **kwargs):
         """No act, only think"""
@@ -474,7 +558,7 @@ class BrainHandler:
             else behavior(self.owner, self)
         )
         instance.at_queue(**kwargs)
-        self.queue.append(behavior)
+        self.queue.append(instance)
 
     def interrupt(self, behavior: BaseBehavior, **kwargs):
         """Adds a behavior to the front of the queue (next in line)"""
@@ -487,16 +571,15 @@ class BrainHandler:
             else behavior(self.owner, self)
         )
         instance.at_queue(**kwargs)
-        self.queue.appendleft(behavior)
+        self.queue.appendleft(instance)
 
     def react(self, trigger, context=None):
         """Triggers the reaction behaviors with the specified trigger."""
         if not context:
             context = {}
-        for behavior in self.behaviors:
+        for behavior in self.reactions.get(trigger, []):
             behavior: BaseBehavior
-            if trigger in behavior.triggers:
-                behavior.at_react(trigger, **context)
+            behavior.at_react(trigger, **context)
 
     def swap_brain(self, brain: BaseBrain, clear=False):
         """
@@ -504,9 +587,12 @@ class BrainHandler:
 
         Args:
             brain:  The brain you want to swap to
+            clear:  (default: False) Also clear all db behaviors
         """
+        self.owner.attributes.add("brain", brain)
         if clear:
             self._clear()
+        self._brain = None
 
     def reset(self):
         """Resets the AI. This erases all behaviors from its pool, as well as"""
@@ -519,9 +605,30 @@ class BrainHandler:
 
     def _clear(self):
         """Clears all db behaviors"""
-        self.db.behaviors = []
-
+        self.owner.db.behaviors = []
+        self._behaviors = None
+
+    def _refresh(self):
+        """Rebuilds the behavior instances and reactions if the brain or the owner's
+        "behaviors" attribute changed since they were built."""
+        brain = self.brain
+        source = self._source("behaviors")
+        if self._behaviors is not None and source is self._behaviorsource:
+            return
+        behaviorsdb = self.owner.attributes.get("behaviors", default=[])
+        unique = dict.fromkeys(list(behaviorsdb) + brain.granted_behaviors)
+        self._behaviors = [behavior(self.owner, self) for behavior in unique]
+        self._behaviorsource = source
+
+        # reaction behaviors, by trigger
+        self._reactions = {}
+        for behavior in self._behaviors:
+            for trigger in behavior.triggers:
+                self._reactions.setdefault(trigger, []).append(behavior)
+
+    def _source(self, key: str):
+        """The stored value of an owner attribute, without unpickling it. Used to
+        notice when the attribute changes."""
+        attr = self.owner.attributes.get(key, return_obj=True)
+        return attr.db_value if attr else None
 
-def act_thread(owner):
-    """Maintains the act thread by being pickleable"""
-    owner.ai.act()
@@ -1,5 +1,17 @@
+import time
+from twisted.internet import reactor
 from evennia.contrib.rpg.buffs.buff import BuffHandler, BaseBuff, Mod
+from evennia.utils.dbserialize import deserialize
 from components.events import GameEvent
+from components.owner import OwnerRef
+from world.ticks import BUFF_TICKS
+
+_DIRTY = set()
+"""Write-behind buff handlers with changes not yet saved to their attribute"""
+_PENDING = None
+"""The reactor call which flushes dirty handlers, if one is scheduled"""
+_CHECK_HOOKS = ("conditional", "at_pre_check", "at_post_check")
+"""Buff hooks run on every check. Buffs which define any of them are never cached"""
 
 
 class BaseBuffExtended(BaseBuff):
@@ -8,8 +20,41 @@ class BaseBuffExtended(BaseBuff):
 
     Changes:
         - Alters `at_trigger` to parse events instead of just a single string
+        - Adds the `cacheable` flag. Buffs whose mods depend on anything but their cache
+          (custom modifiers, say) must set it to False, so their handler never serves
+          their stats from its modifier cache. Buffs defining `conditional` or check hooks
+          are never cached either.
+        - Writing to the buff's cache bumps its handler's modification `version`.
+        - Buffs with a tickrate tick on the shared tick service (see `world.ticks`)
+          instead of their own timers, so `ticking` is always False to the contrib handler.
+        - Adds the `lazytick` flag. Lazy-ticking buffs never tick on a timer; the ticks
+          they have accrued since their last tick are worked out from the time, and run
+          through `at_lazy_tick`, whenever their handler is next read, checked, triggered
+          or cleaned up (which includes expiry).
     """
 
+    cacheable = True
+    lazytick = False
+
+    @property
+    def ticking(self) -> bool:
+        return False
+
+    def __setattr__(self, attr, value):
+        super().__setattr__(attr, value)
+        if attr in self.cache:
+            self.handler.version += 1
+
+    def update_cache(self, to_cache: dict):
+        super().update_cache(to_cache)
+        self.handler.version += 1
+
+    def at_lazy_tick(self, ticks: int, *args, **kwargs):
+        """Hook for lazy-ticking buffs, with the number of ticks accrued since they last
+        ticked. Calls `at_tick` once per tick unless overloaded."""
+        for _ in range(ticks):
+            self.at_tick(False, *args, **kwargs)
+
     def at_trigger(self, triggers: list[str], *args, **kwargs):
         pass
 
@@ -19,11 +64,78 @@ class BuffHandlerExtended(BuffHandler):
 
     Changes:
         - Implements the `event_parse` method for use by the handler.
-        - Automatically subscribes when initialized."""
+        - Automatically subscribes when initialized.
+        - Resolves its owner through a cached `OwnerRef` instead of a database search.
+        - Declares its buffs' triggers as event tags, and reindexes on every event handler
+          it is subscribed to when buffs are added or removed.
+        - Keeps trigger, stat, tag and source indexes of its buffs, updated on add, remove
+          and expire, so lookups only instantiate matching buffs.
+        - Keeps a modification `version`, bumped whenever buffs are added, removed, paused,
+          unpaused or have their cache written to, and caches each stat's calculated mods
+          against it. Repeated checks of the same stat are a dict lookup until the version
+          changes or a buff expires. Stats modified by any buff with `cacheable = False`,
+          a `conditional` or check hooks are never cached, and neither are stats modified
+          by plain contrib buffs unless the handler is write-behind, since their cache
+          writes can't be seen otherwise.
+        - Ticks its extended buffs on the shared tick service instead of one timer each,
+          and registers them again when it loads. Lazy-ticking buffs catch up on their
+          ticks in `catch_up` instead, which runs before gets, checks, cleanups and triggers.
+        - With `writebehind` enabled, the buff cache is loaded from the database once and
+          kept in memory. Any change to it, however deeply nested, marks the handler dirty,
+          and all dirty handlers are saved together once the current event or tick is
+          done (see `flush_buffs`), so a cascade of buff changes is one attribute save."""
+
+    _owner: OwnerRef = None
+    _publishers: list = None
+    _event_tags: set = None
+    _index: dict = None
+    _indexed: dict = None
+    version = 0
+    _modcache: dict = None
+    _catching = False
+    writebehind = False
+    _table: dict = None
+    _dirty = False
 
-    def __init__(self, owner=None, dbkey="buffs", autopause=False):
+    def __init__(self, owner=None, dbkey="buffs", autopause=False, writebehind=False):
+        self._owner = OwnerRef(owner)
+        self._publishers = []
+        self._modcache = {}
+        self.writebehind = writebehind
         super().__init__(owner, dbkey, autopause)
         self.sub()
+        self._resume_ticks()
+
+    @property
+    def owner(self):
+        """The object this handler is attached to."""
+        return self._owner()
+
+    @property
+    def buffcache(self):
+        """The object attribute we use for the buff cache. Auto-creates if not present.
+
+        In write-behind mode, this is the in-memory cache instead."""
+        if not self.writebehind:
+            return super().buffcache
+        if self._table is None:
+            owner = self.owner
+            if not owner:
+                return {}
+            stored = owner.attributes.get(self.dbkey, default={})
+            self._table = TrackedDict(deserialize(stored) if stored else {}, self._changed)
+        return self._table
+
+    def flush(self):
+        """Saves the in-memory buff cache to the database, if it has unsaved changes.
+        Does nothing if this handler is not in write-behind mode."""
+        _DIRTY.discard(self)
+        if not (self.writebehind and self._dirty):
+            return
+        owner = self.owner
+        if owner:
+            owner.attributes.add(self.dbkey, _plain(self._table))
+        self._dirty = False
 
     def sub(self):
         if hasattr(self.owner, "events"):
@@ -34,6 +146,295 @@ class BuffHandlerExtended(BuffHandler):
     def event_parse(self, event: GameEvent):
         self.event_trigger(event)
 
+    def event_tags(self) -> set:
+        """The event tags this handler listens for (the triggers of all its buffs)"""
+        if self._event_tags is None:
+            self._event_tags = set(self.index["trigger"])
+        return self._event_tags
+
+    def at_subscribe(self, events):
+        """Called by an event handler when this handler subscribes to it."""
+        if events not in self._publishers:
+            self._publishers.append(events)
+
+    def at_unsubscribe(self, events):
+        """Called by an event handler when this handler unsubscribes from it."""
+        if events in self._publishers:
+            self._publishers.remove(events)
+
+    @property
+    def index(self) -> dict:
+        """The secondary indexes of this handler's buffs, in the format {index: {value: set(buffkeys)}}.
+        Built from the buffcache on first use, and rebuilt if it falls out of sync."""
+        if self._index is None or len(self._indexed) != len(self.buffcache):
+            self._rebuild_index()
+        return self._index
+
+    def add(self, buff: BaseBuff, *args, **kwargs):
+        # settle accrued ticks before a refresh resets them
+        self.catch_up()
+        starts = {k: b["start"] for k, b in self.buffcache.items() if b["ref"] is buff}
+        super().add(buff, *args, **kwargs)
+
+        # index new buffs, and reindex existing ones in case their source changed
+        cache = self.buffcache
+        for k in [k for k, b in cache.items() if b["ref"] is buff]:
+            self._index_buff(k, cache[k])
+            # (re)applied buffs have a new start time
+            if starts.get(k) == cache[k]["start"]:
+                continue
+            if _ticks(buff):
+                BUFF_TICKS.add(self, k, buff.tickrate)
+            elif _lazy(buff):
+                instance = buff(self, k, cache[k])
+                if instance.conditional():
+                    instance.at_tick(True)
+        self._buffs_changed()
+
+    def remove(self, key, *args, **kwargs):
+        self.catch_up()
+        super().remove(key, *args, **kwargs)
+        if key not in self.buffcache:
+            self._unindex_buff(key)
+            BUFF_TICKS.remove(self, key)
+        self._buffs_changed()
+
+    def _remove_via_dict(self, buffs: dict, *args, **kwargs):
+        super()._remove_via_dict(buffs, *args, **kwargs)
+        for k in buffs or {}:
+            self._unindex_buff(k)
+            BUFF_TICKS.remove(self, k)
+        self._buffs_changed()
+
+    def pause(self, key: str, context=None):
+        self.catch_up()
+        # the contrib works out the time left to the next tick from prevtick
+        last = BUFF_TICKS.last_tick(self, key)
+        if last is not None and key in self.buffcache:
+            self.buffcache[key]["prevtick"] = last
+        super().pause(key, context)
+        BUFF_TICKS.remove(self, key)
+        self.version += 1
+
+    def unpause(self, key: str, context=None):
+        super().unpause(key, context)
+        buff = self.buffcache.get(key)
+        if buff and _ticks(buff["ref"]) and not buff["paused"]:
+            BUFF_TICKS.resume(self, key, buff["ref"].tickrate, buff["prevtick"])
+        self.version += 1
+
+    def get(self, key: str):
+        self.catch_up()
+        return super().get(key)
+
+    def cleanup(self):
+        self.catch_up()
+        super().cleanup()
+
+    def catch_up(self, now: float = None):
+        """Runs the ticks that lazy-ticking buffs have accrued since they last ticked, up
+        to now or the end of their duration.
+
+        Args:
+            now:    (optional) The time to catch up to. Defaults to the current time"""
+        if self._catching:
+            return
+        keys = self.index["lazy"].get(True)
+        if not keys:
+            return
+        self._catching = True
+        try:
+            now = now or time.time()
+            cache = self.buffcache
+            for k in list(keys):
+                b = cache.get(k)
+                if not b or b["paused"]:
+                    continue
+                tickrate = max(1, b["ref"].tickrate)
+                end = now if b["duration"] < 0 else min(now, b["start"] + b["duration"])
+                ticks = int((end - b["prevtick"]) // tickrate)
+                if ticks < 1:
+                    continue
+                cache[k]["prevtick"] = b["prevtick"] + ticks * tickrate
+                buff = b["ref"](self, k, cache[k])
+                if buff.conditional():
+                    buff.at_lazy_tick(ticks)
+        finally:
+            self._catching = False
+
+    def check(
+        self, value: float, stat: str, loud=True, context=None, trigger=False, strongest=False
+    ):
+        """Finds all buffs related to a stat and applies their effects. Identical to the base
+        `check`, but serves cached mods when nothing has changed since the last check of this stat.
+
+        Args:
+            value:  The value you intend to modify
+            stat:   The string that designates which stat buffs you want
+            loud:   (optional) Call the buff's at_post_check method after checking (default: True)
+            context: (optional) A dictionary you wish to pass to the at_pre_check/at_post_check and conditional methods as kwargs
+            trigger: (optional) Trigger buffs with the `stat` string as well. (default: False)
+            strongest:  (optional) Applies only the strongest mods of the corresponding stat value (default: False)
+
+        Returns the value modified by relevant buffs."""
+        if not context:
+            context = {}
+        calc, applied = self.collect_mods(stat, context)
+        final = value if not calc else self._apply_mods(value, calc, strongest=strongest)
+
+        # Run the "after check" functions on all relevant buffs
+        if loud:
+            for buff in applied.values():
+                buff.at_post_check(**context)
+
+        # If you want to, also trigger buffs with the same stat string
+        if trigger:
+            self.trigger(stat, context)
+
+        return final
+
+    def collect_mods(self, stat: str, context: dict = None):
+        """Gathers the calculated mods for a stat, without applying them. Runs pre-check
+        hooks and conditionals, and serves the cached mods if nothing has changed.
+
+        Args:
+            stat:   The string that designates which stat buffs you want
+            context: (optional) A dictionary you wish to pass to the at_pre_check and conditional methods as kwargs
+
+        Returns a tuple of (calculated mods, applied buffs). The calculated mods are None if no buffs
+        modify the stat. Applied buffs are those still awaiting their at_post_check hook; it is empty
+        when the mods came from the cache."""
+        if not context:
+            context = {}
+
+        # accrued lazy ticks may change buffs, so they run before the cache is read
+        self.catch_up()
+
+        # cache hit; (version, calculated mods, expiry timestamp)
+        cached = self._modcache.get(stat)
+        if cached and cached[0] == self.version and time.time() < cached[2]:
+            return cached[1], {}
+
+        # Buff cleanup to make sure all buffs are valid before processing
+        self.cleanup()
+        version = self.version
+
+        # Find all buffs and traits related to the specified stat.
+        applied = self.get_by_stat(stat)
+        if not applied:
+            self._modcache[stat] = (version, None, float("inf"))
+            return None, {}
+        cacheable = all(_cacheable(buff, self.writebehind) for buff in applied.values())
+
+        # Run pre-check hooks on related buffs
+        for buff in applied.values():
+            buff.at_pre_check(**context)
+
+        # Sift out buffs that won't be applying their mods (paused, conditional)
+        applied = {
+            k: buff
+            for k, buff in applied.items()
+            if buff.conditional(**context)
+            if not buff.paused
+        }
+
+        # The mod totals
+        calc = self._calculate_mods(stat, applied)
+        if cacheable:
+            expires = [
+                buff.start + buff.duration
+                for buff in applied.values()
+                if buff.duration > -1
+            ]
+            self._modcache[stat] = (version, calc, min(expires, default=float("inf")))
+
+        return calc, applied
+
+    def super_remove(self, loud=True, dispel=False, expire=False, context=None, **kwargs):
+        """Removes all buffs matching the provided arguments (see `super_get`)."""
+        _remove = self.super_get(**kwargs)
+        if not _remove:
+            return
+        self._remove_via_dict(_remove, loud, dispel, expire, context)
+
+    def get_by_stat(self, stat: str, to_filter=None):
+        return self.super_get(stat=stat, to_filter=to_filter) or {}
+
+    def get_by_trigger(self, trigger: str, to_filter=None):
+        return self.super_get(triggers=[trigger], to_filter=to_filter) or {}
+
+    def get_by_source(self, source, to_filter=None):
+        return self.super_get(source=source, to_filter=to_filter) or {}
+
+    def _rebuild_index(self):
+        """Rebuilds all indexes from the buffcache."""
+        self._index = {"trigger": {}, "stat": {}, "tag": {}, "source": {}, "lazy": {}}
+        self._indexed = {}
+        for k, b in self.buffcache.items():
+            self._index_buff(k, b)
+
+    def _index_buff(self, key, cached: dict):
+        """Adds (or re-adds) a single buff to the indexes."""
+        if self._index is None:
+            self._rebuild_index()
+            return
+        self._unindex_buff(key)
+        buff: BaseBuff = cached["ref"](self, key, cached)
+        entries = {
+            "trigger": set(buff.triggers),
+            "stat": {m.stat for m in buff.mods},
+            "tag": set(getattr(buff, "tags", [])),
+            "source": {_sourcekey(cached.get("source"))} - {None},
+            "lazy": {True} if _lazy(cached["ref"]) else set(),
+        }
+        for name, values in entries.items():
+            for value in values:
+                self._index[name].setdefault(value, set()).add(key)
+        self._indexed[key] = entries
+
+    def _unindex_buff(self, key):
+        """Removes a single buff from the indexes."""
+        if self._index is None:
+            return
+        entries = self._indexed.pop(key, None)
+        if not entries:
+            return
+        for name, values in entries.items():
+            for value in values:
+                keys = self._index[name].get(value)
+                if keys is None:
+                    continue
+                keys.discard(key)
+                if not keys:
+                    del self._index[name][value]
+
+    def _resume_ticks(self):
+        """Registers this handler's ticking buffs on the tick service"""
+        for k, b in self.buffcache.items():
+            if _ticks(b["ref"]) and not b.get("paused"):
+                BUFF_TICKS.resume(self, k, b["ref"].tickrate, b.get("prevtick", time.time()))
+
+    def _changed(self):
+        """Marks the in-memory cache as dirty, and makes sure a flush is coming."""
+        global _PENDING
+        self.version += 1
+        if not self._dirty:
+            self._dirty = True
+            _DIRTY.add(self)
+        if _PENDING is None:
+            _PENDING = reactor.callLater(0, flush_buffs)
+
+    def _buffs_changed(self):
+        """Called whenever buffs are added or removed. Updates the event tag index
+        on all event handlers this handler is subscribed to, if its tags changed."""
+        self.version += 1
+        old = self._event_tags
+        self._event_tags = None
+        if old == self.event_tags():
+            return
+        for events in self._publishers:
+            events.reindex(self)
+
     def super_get(
         self,
         tag: str = None,
@@ -61,30 +462,31 @@ class BuffHandlerExtended(BuffHandler):
         Returns a dictionary sliced according to the arguments you provide. Only buffs matching all
         arguments will be returned.
         """
-        # either an empty dict, all buffs, or the dictionary to filter
-        buffs = self.get_all() if not to_filter else dict(to_filter)
-        if not buffs:
+        cache = self.buffcache
+        if not cache and not to_filter:
             return
 
-        # slicing the dictionary
+        # narrow down the buff keys using the indexes
+        index = self.index
+        keys = set(to_filter) if to_filter else set(cache)
         if tag:
-            buffs = {k: buff for k, buff in buffs.items() if tag in buff.tags}
-        if bufftype:
-            buffs = {k: buff for k, buff in buffs.items() if isinstance(buff, BaseBuff)}
+            keys &= index["tag"].get(tag, set())
         if stat:
-            buffs = {
-                k: buff
-                for k, buff in buffs.items()
-                for m in buff.mods
-                if m.stat == stat
-            }
+            keys &= index["stat"].get(stat, set())
         if triggers:
-            _t = set(triggers)
-            buffs = {
-                k: buff for k, buff in buffs.items() if bool(_t & set(buff.triggers))
-            }
+            keys &= set().union(*(index["trigger"].get(t, ()) for t in triggers))
         if source:
-            buffs = {k: buff for k, buff in buffs.items() if buff.source == source}
+            keys &= index["source"].get(_sourcekey(source), set())
+
+        # only instantiate the matching buffs
+        if to_filter:
+            buffs = {k: buff for k, buff in to_filter.items() if k in keys}
+        else:
+            buffs = {k: cache[k]["ref"](self, k, cache[k]) for k in keys if k in cache}
+
+        # slicing the dictionary
+        if bufftype:
+            buffs = {k: buff for k, buff in buffs.items() if isinstance(buff, bufftype)}
         if cachekey:
             ck, cv = cachekey, cachevalue
             if not cv:
@@ -106,16 +508,15 @@ class BuffHandlerExtended(BuffHandler):
 
         Args:
             trigger:    The string identifier to find relevant buffs. Passed to the at_trigger method.
-            context:    (optional) A dictionary you wish to pass to the at_trigger method as kwargs
+            context:    (optional) A mapping you wish to pass to the at_trigger method as kwargs
             to_trigger: (optional) Dictionary of instanced buffs to use instead of a new default dictionary
         """
+        self.catch_up()
         triggers = event.tags
         _effects = self.super_get(triggers=triggers, to_filter=to_trigger)
-        context = dict(event.context)
         if not _effects:
             return
-        if not context:
-            context = {}
+        context = event.context
 
         # filter out any buffs whose conditional fails or which are paused
         _to_trigger = {
@@ -129,3 +530,220 @@ class BuffHandlerExtended(BuffHandler):
         for buff in _to_trigger.values():
             buff: BaseBuffExtended
             buff.at_trigger(triggers, **context)
+
+
+class CompositeBuffHandler(object):
+    """
+    A read-only view over several buff handlers (for example a character's buffs and perks,
+    and the buffs and perks of their held weapon) which checks a stat across all of them in
+    a single aggregation pass.
+
+    Unlike checking each handler in turn, where every handler's mods apply on top of the
+    previous handler's result, all mods are totalled together and applied to the value once.
+
+    Usage:
+
+    ```python
+    CompositeBuffHandler(obj.buffs, obj.perks).check(damage, "injury")
+    ```
+    """
+
+    handlers: list = None
+
+    def __init__(self, *handlers) -> None:
+        self.handlers = [handler for handler in handlers if handler]
+
+    def check(
+        self, value: float, stat: str, loud=True, context=None, trigger=False, strongest=False
+    ):
+        """Finds all buffs related to a stat on every handler and applies their effects.
+
+        Args:
+            value:  The value you intend to modify
+            stat:   The string that designates which stat buffs you want
+            loud:   (optional) Call the buff's at_post_check method after checking (default: True)
+            context: (optional) A dictionary you wish to pass to the at_pre_check/at_post_check and conditional methods as kwargs
+            trigger: (optional) Trigger buffs with the `stat` string as well. (default: False)
+            strongest:  (optional) Applies only the strongest mods of the corresponding stat value (default: False)
+
+        Returns the value modified by relevant buffs."""
+        if not context:
+            context = {}
+
+        # one pass to gather and merge mods from every handler
+        merged, applied = None, []
+        for handler in self.handlers:
+            calc, _applied = handler.collect_mods(stat, context)
+            if calc:
+                merged = _merge_mods(merged, calc)
+            applied.extend(_applied.values())
+
+        final = value if not merged else self.handlers[0]._apply_mods(value, merged, strongest)
+
+        # Run the "after check" functions on all relevant buffs
+        if loud:
+            for buff in applied:
+                buff.at_post_check(**context)
+
+        # If you want to, also trigger buffs with the same stat string
+        if trigger:
+            for handler in self.handlers:
+                handler.trigger(stat, context)
+
+        return final
+
+
+def _merge_mods(merged: dict, calc: dict) -> dict:
+    """Merges a calculated mods dictionary into another (see `BuffHandler._calculate_mods`)"""
+    if merged is None:
+        return {mod: dict(values) for mod, values in calc.items()}
+    for mod, values in calc.items():
+        _m = merged.setdefault(mod, {"total": 0, "strongest": 0})
+        _m["total"] += values["total"]
+        _m["strongest"] = max(_m["strongest"], values["strongest"])
+    return merged
+
+
+class TrackedDict(dict):
+    """A dictionary which calls back whenever it, or any dictionary or list inside it,
+    changes. Used for write-behind buff caches."""
+
+    def __init__(self, data=None, callback=None):
+        self._callback = callback
+        super().__init__()
+        for k, v in (data or {}).items():
+            super().__setitem__(k, _track(v, callback))
+
+    def __setitem__(self, key, value):
+        super().__setitem__(key, _track(value, self._callback))
+        self._callback()
+
+    def __delitem__(self, key):
+        super().__delitem__(key)
+        self._callback()
+
+    def pop(self, *args):
+        value = super().pop(*args)
+        self._callback()
+        return value
+
+    def popitem(self):
+        item = super().popitem()
+        self._callback()
+        return item
+
+    def setdefault(self, key, default=None):
+        if key not in self:
+            self[key] = default
+        return self[key]
+
+    def update(self, *args, **kwargs):
+        for k, v in dict(*args, **kwargs).items():
+            super().__setitem__(k, _track(v, self._callback))
+        self._callback()
+
+    def clear(self):
+        super().clear()
+        self._callback()
+
+
+class TrackedList(list):
+    """A list which calls back whenever it, or anything inside it, changes."""
+
+    def __init__(self, data=None, callback=None):
+        self._callback = callback
+        super().__init__(_track(v, callback) for v in data or ())
+
+    def _mutate(name):
+        def method(self, *args):
+            result = getattr(list, name)(self, *args)
+            self[:] = [_track(v, self._callback) for v in self]
+            return result
+
+        method.__name__ = name
+        return method
+
+    __delitem__ = _mutate("__delitem__")
+    __iadd__ = _mutate("__iadd__")
+    append = _mutate("append")
+    extend = _mutate("extend")
+    insert = _mutate("insert")
+    pop = _mutate("pop")
+    remove = _mutate("remove")
+    clear = _mutate("clear")
+    sort = _mutate("sort")
+    reverse = _mutate("reverse")
+    del _mutate
+
+    def __setitem__(self, key, value):
+        if isinstance(key, slice):
+            value = [_track(v, self._callback) for v in value]
+        else:
+            value = _track(value, self._callback)
+        super().__setitem__(key, value)
+        self._callback()
+
+
+def flush_buffs(owner=None):
+    """
+    Saves every write-behind buff cache with unsaved changes in one pass.
+
+    Args:
+        owner:  (optional) Only save the handlers of this object
+    """
+    global _PENDING
+    if owner is None:
+        if _PENDING is not None and _PENDING.active():
+            _PENDING.cancel()
+        _PENDING = None
+    for handler in list(_DIRTY):
+        if owner is None or handler.owner == owner:
+            handler.flush()
+
+
+def _track(value, callback):
+    """Wraps dictionaries and lists so changes to them call back"""
+    if isinstance(value, (TrackedDict, TrackedList)):
+        return value
+    if isinstance(value, dict):
+        return TrackedDict(value, callback)
+    if isinstance(value, list):
+        return TrackedList(value, callback)
+    return value
+
+
+def _plain(value):
+    """Unwraps tracked dictionaries and lists, for saving"""
+    if isinstance(value, dict):
+        return {k: _plain(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_plain(v) for v in value]
+    return value
+
+
+def _cacheable(buff, tracked: bool) -> bool:
+    """Checks if a buff's mods can be served from its handler's modifier cache. Only
+    extended buffs report their cache writes, unless the whole cache is tracked."""
+    cls = type(buff)
+    if not getattr(cls, "cacheable", True):
+        return False
+    if not (tracked or isinstance(buff, BaseBuffExtended)):
+        return False
+    return all(getattr(cls, hook) is getattr(BaseBuff, hook) for hook in _CHECK_HOOKS)
+
+
+def _ticks(buff) -> bool:
+    """Checks if a buff class ticks on the tick service"""
+    return issubclass(buff, BaseBuffExtended) and buff.tickrate >= 1 and not buff.lazytick
+
+
+def _lazy(buff) -> bool:
+    """Checks if a buff class ticks lazily"""
+    return issubclass(buff, BaseBuffExtended) and buff.tickrate >= 1 and buff.lazytick
+
+
+def _sourcekey(source):
+    """The key a buff source is indexed by (its dbref, if it has one)"""
+    if source is None:
+        return None
+    return getattr(source, "dbref", source)
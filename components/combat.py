@@ -2,11 +2,16 @@ from typing import TYPE_CHECKING
 import random
 import inflect
 from dataclasses import dataclass, field, fields, is_dataclass
-from components.context import StatContext, congen
+from components.context import ContextView, StatContext
 from components.events import GameEvent
+from components.owner import OwnerRef
 from typeclasses.objects import Object
-import evennia.utils as utils
 from world.rules import verify_context, capitalize
+from world.timers import TIMERS
+from world.output import batch, tell
+from world.rolls import OpposedRolls, opposed_rolls
+from world.occupancy import OCCUPANCY
+from world.scheduler import AI_SCHEDULER
 
 p = inflect.engine()
 
@@ -33,7 +38,7 @@ PREFIX = "..."
 NEWLINE = "|n\n"
 
 
-@dataclass
+@dataclass(slots=True)
 class AttackContext:
     div: int | float
     hit: StatContext = field(default_factory=StatContext)
@@ -44,7 +49,7 @@ class AttackContext:
     isCrit: bool = False
 
 
-@dataclass
+@dataclass(slots=True)
 class CombatContext:
     attacker: Object = None
     target: Object = None
@@ -56,7 +61,7 @@ class CombatContext:
     overkill: int | float = 0
 
 
-@dataclass
+@dataclass(slots=True)
 class OffenseStats:
     accuracy: int | float = 1.0
     opposing: str = "evasion"
@@ -65,7 +70,7 @@ class OffenseStats:
     mult: int | float = 2.0
 
 
-@dataclass
+@dataclass(slots=True)
 class WeaponStats:
     weapon: str = "Template"
     accuracy: int | float = 1.0
@@ -79,13 +84,86 @@ class WeaponStats:
     prototype_key: str = ""
 
 
+class CombatSnapshot(object):
+    """
+    The buffed stats of one attack, resolved once and reused for every shot. Each stat
+    is kept against the version of the buff handler it came from, so a buff added or
+    removed mid-attack (by a hit trigger, say) makes only the stats from that handler
+    resolve again.
+
+    Attrs:
+        attacker:   The attacking object
+        target:     The defending object
+        stats:      The attack's stats. WeaponStats or OffenseStats dataclass
+    """
+
+    __slots__ = ("attacker", "target", "stats", "_mods", "_evasion")
+
+    def __init__(self, attacker, target, stats) -> None:
+        self.attacker = attacker
+        self.target = target
+        self.stats = stats
+        self._mods = {}
+        self._evasion = None
+
+    @property
+    def accuracy(self) -> float:
+        """The attacker's buffed accuracy"""
+        return self.check(self.attacker.buffs, self.stats.accuracy, "accuracy")
+
+    @property
+    def evasion(self) -> float:
+        """The target's buffed opposing stat (evasion, unless the stats say otherwise)"""
+        version = self.target.buffs.version
+        if self._evasion is None or self._evasion[0] != version:
+            opposing = getattr(self.stats, "opposing", "evasion")
+            self._evasion = (version, getattr(self.target, opposing, 0))
+        return self._evasion[1]
+
+    @property
+    def precision(self) -> float:
+        """The attacker's buffed crit damage multiplier"""
+        return self.check(self.attacker.buffs, self.stats.mult, "precision")
+
+    def deflect(self, damage) -> float:
+        """Returns damage modified by the target's injury buffs, like `CombatHandler.deflect`"""
+        return self.check(self.target.buffs, damage, "injury")
+
+    def check(self, handler, value, stat: str) -> float:
+        """
+        Applies a handler's mods for a stat to a value, collecting the mods only if the
+        handler has changed since they were last collected.
+
+        Args:
+            handler:    The buff handler
+            value:      The value to modify
+            stat:       The stat to modify it as
+        """
+        key = (id(handler), stat)
+        cached = self._mods.get(key)
+        if cached is None or cached[0] != handler.version:
+            calc, applied = handler.collect_mods(stat)
+            cached = self._mods[key] = (handler.version, calc, applied)
+        _, calc, applied = cached
+        final = value if not calc else handler._apply_mods(value, calc)
+        for buff in applied.values():
+            buff.at_post_check()
+        return final
+
+
 class CombatHandler(object):
     """Performs various combat-related tasks."""
 
-    owner = None
+    _owner: OwnerRef = None
+    _settling = False
 
     def __init__(self, owner) -> None:
-        self.owner = owner
+        self._owner = OwnerRef(owner)
+
+    @property
+    def owner(self):
+        """The object this handler is attached to."""
+        return self._owner()
 
     @property
     def hp(self):
@@ -115,6 +193,17 @@ class CombatHandler(object):
         else:
             return None
 
+    def settle(self):
+        """Runs the ticks lazy-ticking buffs (like poison) have accrued, so their damage
+        lands before health is changed or read. Does nothing if already settling."""
+        if self._settling:
+            return
+        self._settling = True
+        try:
+            self.owner.buffs.catch_up()
+        finally:
+            self._settling = False
+
     def end_combat(self):
         """Ends combat on this object"""
         self.owner.tags.clear(category="combat")
@@ -153,11 +242,15 @@ class CombatHandler(object):
             context:    Context to update
         """
 
+        # lazy-ticking damage lands first
+        self.settle()
+
         # setting up the game event tags
         defender_tags = []
         attacker_tags = []
 
         # calculate damage
+        buffeddamage = damage
         if buffcheck:
             buffeddamage = self.owner.check_buffs(damage, "injury")
         _hp = int(self.hp)
@@ -167,25 +260,25 @@ class CombatHandler(object):
         if taken > 0:
             defender_tags.append("injured")
 
-        # context updating and dict conversion (or basic values)
+        # context updating (or basic values)
         if context:
             context.taken, context.overkill = taken, overkill
-            context = congen([context])
         else:
-            context = {
-                "attacker": attacker,
-                "target": self.owner,
-                "damage": damage,
-                "taken": taken,
-                "element": element,
-                "overkill": overkill,
-            }
+            context = CombatContext(
+                attacker=attacker,
+                target=self.owner,
+                damage=damage,
+                taken=taken,
+                element=element,
+                overkill=overkill,
+            )
 
         # deal damage
         self.hp = max(self.hp - taken, 0)
-        was_kill = self.hp <= 0
+        # only a living target can be killed; accrued ticks may have done it already
+        was_kill = _hp > 0 and self.hp <= 0
         if loud:
-            self.owner.msg("|rYou take {0} damage!|n".format(taken))
+            tell(self.owner, "|rYou take {0} damage!|n".format(taken))
 
         # assign attacker to this object's ndb
         if self.owner.ndb.attackers:
@@ -215,13 +308,14 @@ class CombatHandler(object):
                 self.owner.events.send(attacker_tags, attacker, context)
 
         # return the combat context
-        return CombatContext(**context)
+        return context
 
     def die(self, context=None):
         """Die! Marks you as dead."""
         # tag and buff stuff
         self.end_combat()
         self.owner.tags.add("dead", category="combat")
+        OCCUPANCY.update(self.owner)
         self.owner.buffs.super_remove(tag="remove_on_death")
 
         # messaging
@@ -231,7 +325,7 @@ class CombatHandler(object):
 
         # send message and delay revive
         self.owner.location.msg_contents(formatted)
-        utils.delay(10, _revive, self.owner, persistent=True)
+        TIMERS.schedule(10, _revive, self.owner, key="revive:" + self.owner.dbref)
 
     def revive(self):
         """Revive! You aren't dead anymore!"""
@@ -245,8 +339,9 @@ class CombatHandler(object):
         """
         if not heal:
             return
+        self.settle()
         self.hp = min(self.hp + heal, self.maxhp)
-        self.owner.msg("You healed by %i!" % heal)
+        tell(self.owner, "You healed by %i!" % heal)
 
     def opposed_hit(self, acc=0.0, eva=0.0, crit=2.0, damage=0) -> AttackContext:
         """
@@ -262,30 +357,8 @@ class CombatHandler(object):
 
         Returns an AttackContext object
         """
-        # Roll two d100s
-        _hit = int(random.random() * 100)
-        _dodge = int(random.random() * 100)
-
-        # Add random(accuracy) to the relevant values
-        accuracy = acc * random.random()
-        evasion = eva * random.random()
-
-        _h = {"base": _hit, "bonus": accuracy, "total": round(_hit + accuracy)}
-        _d = {"base": _dodge, "bonus": evasion, "total": round(_dodge + evasion)}
-        hit, eva = StatContext(**_h), StatContext(**_d)
-
-        update = {
-            "hit": hit,
-            "eva": eva,
-            "div": (_hit + accuracy) / (_dodge + evasion),
-            "damage": damage,
-            "isHit": (_hit + accuracy) > (_dodge + evasion),
-            "isCrit": _hit > _dodge * crit,
-        }
-
-        # Generate the AttackContext
-        context: AttackContext = AttackContext(**update)
-        return context
+        rolls = opposed_rolls(acc, eva, crit)
+        return _attack_context(rolls, 0, damage)
 
     # region attack types
     def basic_attack(
@@ -307,16 +380,28 @@ class CombatHandler(object):
 
         evasion = getattr(target, stats.opposing, 0)
         attack = self.opposed_hit(stats.accuracy, evasion)
+        return self._resolve_hit(stats, target, attack)
 
+    def _resolve_hit(
+        self, stats: OffenseStats, target, attack: AttackContext, snapshot=None
+    ):
+        """Applies precision and deflection to a basic attack, if it hit. Stats come
+        from the snapshot, if one is given."""
         # if attack was successful
         if attack.isHit:
             # if crit (hit > evasion * crit), multiply damage
             if attack.isCrit:
-                precision_mult = self.buffs.check(stats.mult, "precision")
+                if snapshot:
+                    precision_mult = snapshot.precision
+                else:
+                    precision_mult = self.buffs.check(stats.mult, "precision")
                 attack.damage *= precision_mult
 
             # damage modification
-            attack.deflected = target.combat.deflect(attack.damage)
+            if snapshot:
+                attack.deflected = snapshot.deflect(attack.damage)
+            else:
+                attack.deflected = target.combat.deflect(attack.damage)
 
         return attack
 
@@ -335,6 +420,7 @@ class CombatHandler(object):
             exclude:    The list of objects to exclude from the target pool (default: None)
             hurt:       If this AoE hurts the attacker too (default: False)
 
+        Returns a list of AttackContexts, one per target hit.
         """
         if not targets:
             return
@@ -342,14 +428,19 @@ class CombatHandler(object):
 
         # find targets via set comparison
         _t = set(targets)
-        _e = set(exclude)
+        _e = set(exclude) if exclude else set()
         if not hurt:
             _e.add(self.owner)
-        valids = _t.difference(_e)
+        valids = list(_t.difference(_e))
 
-        # attempt a basic attack on each target
-        for target in valids:
-            attack = self.basic_attack(stats, target)
+        # roll against every target at once; only hits get a context
+        evasions = [getattr(target, stats.opposing, 0) for target in valids]
+        rolls = opposed_rolls(stats.accuracy, evasions)
+        for i in rolls.hits:
+            attack = _attack_context(rolls, i)
+            attacks.append(self._resolve_hit(stats, valids[i], attack))
+
+        return attacks
 
     def rapid(
         self,
@@ -368,32 +459,40 @@ class CombatHandler(object):
             burst:      If this attack continues even if a miss occurs (default: False)
 
         """
+        with batch(self.owner.location):
+            return self._rapid(stats, defender, shots, burst)
+
+    def _rapid(self, stats: OffenseStats, defender, shots: int = 1, burst=False):
+        """Performs a rapid attack. Output is batched by `rapid`."""
         messaging = ""
 
         attacker = self.owner
         total = 0
 
+        # roll every shot at once
+        snapshot = CombatSnapshot(attacker, defender, stats)
+        rolls = opposed_rolls(stats.accuracy, snapshot.evasion, count=shots)
+
+        # initial messaging
+        if len(rolls):
+            rollmsg = "  HIT: +{0} vs EVA: +{1}".format(*_roll_totals(rolls, 0))
+            messaging += rollmsg + NEWLINE
+
+        # only burst weapons continue firing after a miss
+        fired = shots if burst else min(rolls.first_miss() + 1, shots)
+
         # for each shot
-        for x in range(shots):
-            # perform a basic attack
-            attack: AttackContext = self.basic_attack(stats, defender, "awareness")
+        for x in range(fired):
             damagelist = ""
 
-            # if this is the first shot, create the initial messaging
-            if x == 0:
-                hitmapping = {"hit": attack.hit.total, "eva": attack.eva.total}
-                rollmsg = "  HIT: +{hit} vs EVA: +{eva}".format(**hitmapping)
-                messaging += rollmsg + NEWLINE
-
             # if we miss
-            if not attack.isHit:
+            if not rolls.isHit[x]:
                 damagelist += " Miss!"
-                # only burst weapons continue firing after a miss
-                if not burst:
-                    break
 
             # if we hit
-            if attack.isHit:
+            else:
+                attack = _attack_context(rolls, x)
+                attack = self._resolve_hit(stats, defender, attack, snapshot)
                 m = " {0} damage!".format(attack.deflected)
                 if attack.isCrit:
                     m = "|520" + m + "|n"
@@ -416,6 +515,12 @@ class CombatHandler(object):
             weapon:   The weapon you are using. WeaponStats dataclass
             target:   The target you are attacking
         """
+        # all room output of the attack goes out as one message per recipient
+        with batch(self.owner.location):
+            return self._weapon_attack(weapon, target)
+
+    def _weapon_attack(self, weapon: WeaponStats, target: Object):
+        """Performs a weapon attack. Output is batched by `weapon_attack`."""
         # initial context
         attacker: Object = self.owner
         weapon_object = attacker.attributes.get("held", None)
@@ -428,21 +533,17 @@ class CombatHandler(object):
         }
         combat: CombatContext = CombatContext(**_basics)
 
-        # variable assignments
-        accuracy_modified = attacker.buffs.check(weapon.accuracy, "accuracy")
-        evasion = getattr(target, "evasion", 0)
+        # every buffed stat of the attack, resolved once for all shots
+        snapshot = CombatSnapshot(attacker, target, weapon)
 
         # opening damage message formatting
-        mapping = congen([combat])
-        mapping.update(
-            {
-                "weapon": weapon.weapon,
-                "attacker": attacker.get_display_name(),
-                "target": target.get_display_name(),
-            }
-        )
+        names = {
+            "weapon": weapon.weapon,
+            "attacker": attacker.get_display_name(),
+            "target": target.get_display_name(),
+        }
         room_msg = weapon.messaging.get("attack", DEFAULT_ATTACK_MSG)
-        formatted = capitalize(room_msg.format(**mapping))
+        formatted = capitalize(room_msg.format_map(ContextView(names, combat)))
 
         # send message
         attacker.location.msg_contents(NEWLINE)
@@ -453,39 +554,33 @@ class CombatHandler(object):
         was_hit = False
         was_crit = False
 
-        # roll to hit based on number of shots
-        for x in range(shots):
-            # roll to hit and update variables
-            attack: AttackContext = self.opposed_hit(
-                accuracy_modified, evasion, weapon.crit, weapon.damage
-            )
-
-            # if this is the first shot, send the initial hit roll numbers
-            if x == 0:
-                hitmapping = {"hit": attack.hit.total, "eva": attack.eva.total}
-                roll_msg = "  HIT: +{hit} vs EVA: +{eva}"
-                formatted = roll_msg.format(**hitmapping)
-                attacker.location.msg_contents(formatted)
+        # roll to hit for every shot at once
+        rolls = opposed_rolls(snapshot.accuracy, snapshot.evasion, weapon.crit, shots)
 
-            # if attack was successful
-            if attack.isHit:
-                was_hit = True
+        # send the initial hit roll numbers, from the first shot
+        if len(rolls):
+            hitmapping = dict(zip(("hit", "eva"), _roll_totals(rolls, 0)))
+            roll_msg = "  HIT: +{hit} vs EVA: +{eva}"
+            formatted = roll_msg.format(**hitmapping)
+            attacker.location.msg_contents(formatted)
 
-                # if crit (hit > evasion * crit), multiply damage
-                if attack.isCrit:
-                    was_crit = True
-                    precision_mult = attacker.buffs.check(weapon.mult, "precision")
-                    attack.damage *= precision_mult
+        # only successful shots become attacks
+        for x in rolls.hits:
+            attack: AttackContext = _attack_context(rolls, x, weapon.damage)
+            was_hit = True
 
-                # creating combined context dictionary
-                context = congen([attack, combat])
+            # if crit (hit > evasion * crit), multiply damage
+            if attack.isCrit:
+                was_crit = True
+                attack.damage *= snapshot.precision
 
-                # attacker publishes event
-                attacker.events.publish(["hit"], attacker, context)
+            # attacker publishes event, with a view over both contexts
+            # (combat first, so its keys win as they did when the two were merged)
+            attacker.events.publish(["hit"], attacker, ContextView(combat, attack))
 
-                # damage modification
-                attack.deflected = target.combat.deflect(attack.damage)
-                combat.attacks.append(attack)
+            # damage modification
+            attack.deflected = snapshot.deflect(attack.damage)
+            combat.attacks.append(attack)
 
         # hit (at least one successful hit)
         if was_hit:
@@ -507,10 +602,8 @@ class CombatHandler(object):
             # attacks message
             attacker.location.msg_contents(INDENT + PREFIX + dmglist_msg)
 
-            # apply total damage buffs
-            if weapon_object:
-                combat.damage = weapon_object.buffs.check(combat.damage, "total_damage")
-            combat.damage = attacker.check_buffs(combat.damage, "total_damage")
+            # apply total damage buffs (character and held weapon)
+            combat.damage = attacker.check_buffs(combat.damage, "total_damage", held=True)
 
             # total damage message
             TOTAL = "  = "
@@ -521,8 +614,6 @@ class CombatHandler(object):
             # hit messaging
             formatted, msg = "", ""
 
-            mapping = congen([combat])
-
             if not combat.taken:
                 msg = DEFAULT_TEMP_MSG["bullet"]["invuln"]
             elif was_crit:
@@ -530,7 +621,7 @@ class CombatHandler(object):
             else:
                 msg = weapon.messaging.get("hit", DEFAULT_HIT_MSG)
 
-            formatted = msg.format(**mapping)
+            formatted = msg.format_map(ContextView(combat))
             capitalized = capitalize(formatted)
             attacker.location.msg_contents("|520" + INDENT + capitalized)
 
@@ -547,11 +638,39 @@ class CombatHandler(object):
     # endregion
 
 
+def _attack_context(rolls: OpposedRolls, index: int, damage=0) -> AttackContext:
+    """Builds the AttackContext for a single roll of a batch."""
+    _hit, accuracy, _dodge, evasion, isHit, isCrit = rolls.roll(index)
+    hit = StatContext(_hit, accuracy, round(_hit + accuracy))
+    eva = StatContext(_dodge, evasion, round(_dodge + evasion))
+    return AttackContext(
+        div=(_hit + accuracy) / (_dodge + evasion),
+        hit=hit,
+        eva=eva,
+        damage=damage,
+        isHit=isHit,
+        isCrit=isCrit,
+    )
+
+
+def _roll_totals(rolls: OpposedRolls, index: int) -> tuple:
+    """The rounded (hit, evasion) totals of a single roll, without building a context."""
+    _hit, accuracy, _dodge, evasion, _, _ = rolls.roll(index)
+    return round(_hit + accuracy), round(_dodge + evasion)
+
+
 def _revive(target):
     """Revive! You aren't dead anymore!"""
+    if not target:
+        return
+
     # tag stuff
     target.tags.clear(category="combat")
+    OCCUPANCY.update(target)
     target.db.hp = target.db.maxhp
+    # a revived player is a target again, for any NPCs that went dormant meanwhile
+    if target.has_account:
+        AI_SCHEDULER.wake_near(target.location)
 
     # messaging
     rev_msg = target.attributes.get("messaging", {}).get("revive", None)
@@ -573,8 +692,5 @@ def rainbowfy(string: str):
 
 def _enhance_total(value, attacker):
     """Enhances total damage via buffs for weapon (if applicable) and character"""
-    weapon_object = attacker.attributes.get("held", None)
-    if weapon_object:
-        total = weapon_object.buffs.check(value, "total_damage")
-    total = attacker.check_buffs(value, "total_damage")
+    total = attacker.check_buffs(value, "total_damage", held=True)
     return total
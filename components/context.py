@@ -1,24 +1,86 @@
+from collections.abc import Mapping
 from dataclasses import dataclass, field, fields
 
 
-@dataclass
+@dataclass(slots=True)
 class BaseContext:
     pass
 
 
-@dataclass
+@dataclass(slots=True)
 class StatContext:
     base: int | float = 0
     bonus: int | float = 0
     total: int | float = 0
 
 
+class ContextView(Mapping):
+    """A read-only mapping over one or more contexts, without copying them.
+
+    Contexts can be dataclasses (slotted or not) or dictionaries. Where contexts share a
+    key, the first one wins, so put overrides first. Values are read when they are looked
+    up, so the view always shows the contexts as they are now.
+
+    Works anywhere a mapping does, including as kwargs and with `str.format_map`:
+
+    ```python
+    view = ContextView({"weapon": name}, combat)
+    message.format_map(view)
+    buff.at_trigger(triggers, **view)
+    ```"""
+
+    __slots__ = ("contexts",)
+
+    def __init__(self, *contexts) -> None:
+        self.contexts = contexts
+
+    def __getitem__(self, key):
+        for context in self.contexts:
+            if isinstance(context, Mapping):
+                if key in context:
+                    return context[key]
+            elif key in _names(context):
+                return getattr(context, key)
+        raise KeyError(key)
+
+    def __iter__(self):
+        if len(self.contexts) == 1:
+            yield from _names(self.contexts[0])
+            return
+        seen = set()
+        for context in self.contexts:
+            for key in _names(context):
+                if key not in seen:
+                    seen.add(key)
+                    yield key
+
+    def __len__(self):
+        if len(self.contexts) == 1:
+            return len(_names(self.contexts[0]))
+        return sum(1 for _ in self)
+
+    def __contains__(self, key):
+        return any(key in _names(context) for context in self.contexts)
+
+    def __repr__(self):
+        return "ContextView(%s)" % ", ".join(repr(c) for c in self.contexts)
+
+
+def _names(context):
+    """The keys of a context: a mapping, or a dataclass's field names"""
+    if isinstance(context, Mapping):
+        return context
+    return context.__dataclass_fields__
+
+
 def asdict_shallow(dc) -> dict:
     """Does a shallow conversion of dataclass to dict.
 
     Should be used instead of asdict on any dataclasses which store game object
     references and not just literals, as the database connection makes
-    asdict mad."""
+    asdict mad.
+
+    Prefer `ContextView` when the dict is only read."""
     r = dict((field.name, getattr(dc, field.name)) for field in fields(dc))
     return r
 
@@ -29,7 +91,8 @@ def congen(clist: list) -> dict:
     Will overwrite values of the same name so you should use this mainly for dataclasses
     with no intersection keys or with values you want to overwrite.
 
-    Used here to generate "contexts" for use in game systems"""
+    Used here to generate "contexts" for use in game systems. Prefer `ContextView` when
+    the dict is only read; note that it lets the first context win, not the last."""
 
     return_dict = {}
     for context in clist:
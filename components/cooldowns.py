@@ -1,8 +1,15 @@
 from dataclasses import dataclass
 import time
-from evennia import utils
+from evennia.utils.dbserialize import deserialize
 
-from evennia.utils import search
+from components.owner import OwnerRef
+from world.timers import TIMERS
+
+FLUSH_INTERVAL = 10
+"""How often, in seconds, dirty write-behind cooldown tables are saved"""
+
+_DIRTY = set()
+"""Write-behind handlers with changes not yet saved to their attribute"""
 
 
 @dataclass
@@ -31,26 +38,43 @@ class CooldownHandler(object):
     Cooldowns are simple timestamps and strings used for quick-and-easy timers.
     They save to the database and can be manipulated by various handler methods.
 
+    With `writebehind` enabled, the cooldown table is loaded from the database once and
+    kept in memory. Changes mark the handler dirty, and dirty handlers are saved in a
+    batch by `flush_cooldowns` (on a timer, at unpuppet and at server stop).
+
     """
 
     ownerref = None
+    _owner: OwnerRef = None
     dbkey = "cooldowns"
     autopause = False
+    writebehind = False
+    _table: dict = None
+    _dirty = False
 
-    def __init__(self, owner, dbkey=dbkey, autopause=autopause):
+    def __init__(self, owner, dbkey=dbkey, autopause=autopause, writebehind=writebehind):
         self.ownerref = owner.dbref
+        self._owner = OwnerRef(owner)
         self.dbkey = dbkey
         self.autopause = autopause
+        self.writebehind = writebehind
 
     @property
     def owner(self):
         """The object this handler is attached to"""
-        return search.search_object(self.ownerref)[0]
+        return self._owner()
 
     @property
     def db(self):
         """The object attribute we use for the cooldown database. Auto-creates if not present.
-        Convenience shortcut (equal to `self.owner.db.dbkey`)"""
+        Convenience shortcut (equal to `self.owner.db.dbkey`)
+
+        In write-behind mode, this is the in-memory table instead."""
+        if self.writebehind:
+            if self._table is None:
+                stored = self.owner.attributes.get(self.dbkey, default={})
+                self._table = deserialize(stored) if stored else {}
+            return self._table
         if not self.owner.attributes.has(self.dbkey):
             self.owner.attributes.add(self.dbkey, {})
         return self.owner.attributes.get(self.dbkey)
@@ -101,6 +125,7 @@ class CooldownHandler(object):
             "context": {},
         }
         self.db[key] = cooldown
+        self._changed()
 
         # cooldown messaging
         if not stifle:
@@ -109,19 +134,25 @@ class CooldownHandler(object):
             formatted = message.format(key=key, **cooldown).capitalize()
             self.owner.msg(formatted)
 
-        utils.delay(duration, cleanup, self, persistent=True)
+        self._schedule(key)
 
     def extend(self, key, amount):
         """Extends an existing cooldown's duration"""
         self.db[key]["duration"] += amount
+        self._changed()
+        self._schedule(key)
 
     def shorten(self, key, amount):
         """Shortens an existing cooldown's duration"""
         self.db[key]["duration"] -= amount
+        self._changed()
+        self._schedule(key)
 
     def restart(self, key):
         """Restarts the cooldown by setting start to now. Does not change duration"""
         self.db[key]["start"] = time.time()
+        self._changed()
+        self._schedule(key)
 
     def remove(self, key):
         """
@@ -139,6 +170,8 @@ class CooldownHandler(object):
             else:
                 self.owner.location.msg(cooldown.message)
         del self.db[key]
+        self._changed()
+        TIMERS.cancel(self._timerkey(key))
 
     def time_left(self, key) -> float:
         """Checks to see how much time is left on cooldown with the specified key."""
@@ -147,9 +180,53 @@ class CooldownHandler(object):
             return cooldown.timeleft
         return 0
 
+    def flush(self):
+        """Saves the in-memory cooldown table to the database, if it has unsaved changes.
+        Does nothing if this handler is not in write-behind mode."""
+        _DIRTY.discard(self)
+        if not (self.writebehind and self._dirty):
+            return
+        owner = self.owner
+        if owner:
+            owner.attributes.add(self.dbkey, self._table)
+        self._dirty = False
+
+    def _timerkey(self, key) -> str:
+        """The key of the expiry timer for the specified cooldown"""
+        return "cooldown:%s:%s:%s" % (self.ownerref, self.dbkey, key)
+
+    def _schedule(self, key):
+        """(Re)schedules the expiry timer for the specified cooldown on the shared timing wheel."""
+        cooldown = self.db[key]
+        timeleft = cooldown["duration"] - (time.time() - cooldown["start"])
+        TIMERS.schedule(
+            timeleft, expire, self.owner, self.dbkey, key, key=self._timerkey(key)
+        )
+
+    def _changed(self):
+        """Marks the in-memory table as dirty so the next flush saves it."""
+        if self.writebehind and not self._dirty:
+            self._dirty = True
+            _DIRTY.add(self)
+
 
 def cleanup(handler: CooldownHandler):
     """Does a quick cleanup of cooldowns to ensure they are still valid/active, removing any that aren't"""
-    for key in handler.db:
+    for key in list(handler.db):
         instance = handler.get(key)
         del instance
+
+
+def expire(owner, dbkey, key):
+    """Timer callback which expires a single cooldown, if it is ready"""
+    if not owner:
+        return
+    handler: CooldownHandler = owner.cooldowns
+    if handler.dbkey == dbkey:
+        handler.get(key)
+
+
+def flush_cooldowns():
+    """Saves every write-behind cooldown table with unsaved changes in one pass."""
+    for handler in list(_DIRTY):
+        handler.flush()
@@ -1,17 +1,18 @@
 import time
 from dataclasses import dataclass, asdict, is_dataclass, fields, field
 from typeclasses.objects import Object
-from components.context import asdict_shallow
-from evennia.utils import search, utils
+from components.context import ContextView
+from components.owner import OwnerRef
+from evennia.utils import utils
 
 EVENT = {"source": None, "timestamp": None, "context": None}
 
 
-@dataclass
+@dataclass(slots=True)
 class GameEvent:
     source: Object
     timestamp: float
-    context: dict
+    context: dict | ContextView
     tags: list[str] = field(default_factory=list)
 
 
@@ -27,24 +28,31 @@ class EventHandler(object):
     ```
 
     Otherwise it will function improperly.
+
+    Subscribers can declare which event tags they care about by implementing an
+    `event_tags` method, which returns a collection of tag strings. The handler keeps a
+    tag -> subscriber index, so publishing only reaches interested subscribers.
+    Subscribers without `event_tags` (or which return None) receive every event.
+
+    Subscribers whose tags change must call `reindex` on every handler they are
+    subscribed to. The optional `at_subscribe` and `at_unsubscribe` hooks are called
+    with this handler, so subscribers can keep track of those.
     """
 
     ownerref = None
-    _owner = None
+    _owner: OwnerRef = None
 
     def __init__(self, owner) -> None:
         self.ownerref = owner.dbref
+        self._owner = OwnerRef(owner)
         self.subs = []
+        self.index = {}
+        self.wildcard = []
 
     @property
     def owner(self):
         """The object this handler is attached to."""
-        if self.ownerref:
-            _owner = search.search_object(self.ownerref)
-        if _owner:
-            return _owner[0]
-        else:
-            return None
+        return self._owner()
 
     def subscribe(self, subscriber):
         """Subscribes to this event manager. Subscribing objects must implement
@@ -54,7 +62,12 @@ class EventHandler(object):
             subscriber: The subscribing object to add
 
         All subscribers are cleared on server reload/init."""
+        if subscriber in self.subs:
+            return
         self.subs.append(subscriber)
+        self._index(subscriber)
+        if hasattr(subscriber, "at_subscribe"):
+            subscriber.at_subscribe(self)
         return
 
     def unsubscribe(self, subscriber):
@@ -67,27 +80,60 @@ class EventHandler(object):
         Note that a server reload will wipe all subs from this manager."""
         if subscriber in self.subs:
             self.subs.remove(subscriber)
+            self._unindex(subscriber)
+            if hasattr(subscriber, "at_unsubscribe"):
+                subscriber.at_unsubscribe(self)
         return
 
+    def reindex(self, subscriber):
+        """Updates the tag index for a subscriber whose tags have changed.
+
+        Args:
+            subscriber: The subscribing object to reindex"""
+        if subscriber not in self.subs:
+            return
+        self._unindex(subscriber)
+        self._index(subscriber)
+
+    def interested(self, tags: list[str]) -> list:
+        """Returns the subscribers which care about any of the given tags.
+
+        Args:
+            tags:   The list of event tags"""
+        if isinstance(tags, str):
+            tags = [tags]
+        found = list(self.wildcard)
+        for tag in tags:
+            for sub in self.index.get(tag, []):
+                if sub not in found:
+                    found.append(sub)
+        return found
+
     def publish(self, tags=[], source=None, context=None):
         """Publish an event to this handler's subscribers.
 
         Args:
             name:   The event string, used for triggering stuff
             source:     The source object of the event
-            context:    The dataclass or dictionary holding our event's context"""
-        # validate and dict-ify the context
-        context = {} if not context else context
-        is_dc = is_dataclass(context)
-        _c = asdict_shallow(context) if is_dc else context
+            context:    The dataclass or mapping holding our event's context"""
+        # only subscribers listening for these tags
+        subs = self.interested(tags)
+        if not subs:
+            return
+
+        # dataclass contexts are viewed as a mapping, not copied
+        if context is None:
+            context = {}
+        elif is_dataclass(context):
+            context = ContextView(context)
 
         # create event context
         event: GameEvent = GameEvent(
-            source=source, timestamp=time.time(), context=_c, tags=tags
+            source=source, timestamp=time.time(), context=context, tags=tags
         )
 
         # event parsing
-        for sub in self.subs:
+        for sub in subs:
             # any objects subscribing to an event manager should implement this method
             sub.event_parse(event)
 
@@ -119,5 +165,26 @@ class EventHandler(object):
             self.send(obj, name, context)
 
 
+    def _index(self, subscriber):
+        """Adds a subscriber to the tag index"""
+        tags = subscriber.event_tags() if hasattr(subscriber, "event_tags") else None
+        if tags is None:
+            self.wildcard.append(subscriber)
+            return
+        for tag in tags:
+            self.index.setdefault(tag, []).append(subscriber)
+
+    def _unindex(self, subscriber):
+        """Removes a subscriber from the tag index"""
+        if subscriber in self.wildcard:
+            self.wildcard.remove(subscriber)
+        for tag in list(self.index):
+            subs = self.index[tag]
+            if subscriber in subs:
+                subs.remove(subscriber)
+            if not subs:
+                del self.index[tag]
+
+
 def event_parse(event):
     pass
@@ -0,0 +1,82 @@
+import weakref
+from evennia.objects.models import ObjectDB
+from evennia.utils import search
+
+
+class OwnerRef(object):
+    """
+    A cached reference to the object a handler is attached to.
+
+    Handlers used to resolve their owner with `search.search_object(dbref)` on every
+    access. This keeps a weak reference to the owner instead, and only falls back
+    to the idmapper cache (and then the database) when the reference goes stale.
+
+    The reference is considered stale when:
+        - the owner was garbage collected
+        - the owner was deleted (its `pk` is cleared by the database)
+        - the owner was flushed from the idmapper cache and reloaded as a new instance
+
+    Usage:
+
+    ```python
+    def __init__(self, owner):
+        self.ownerref = owner.dbref
+        self._owner = OwnerRef(owner)
+
+    @property
+    def owner(self):
+        return self._owner()
+    ```
+    """
+
+    __slots__ = ("dbref", "id", "_ref")
+
+    def __init__(self, owner) -> None:
+        self.dbref = owner.dbref
+        self.id = owner.id
+        self._ref = weakref.ref(owner)
+
+    def __call__(self):
+        """Returns the owner, or None if it no longer exists."""
+        obj = self._ref() if self._ref else None
+
+        # fast path; the weakref is alive and still the cached instance
+        if obj is not None and obj.pk:
+            cached = ObjectDB.get_cached_instance(self.id)
+            if cached is None or cached is obj:
+                return obj
+            self._ref = weakref.ref(cached)
+            return cached
+
+        # slow path; idmapper, then the database
+        obj = ObjectDB.get_cached_instance(self.id)
+        if obj is None:
+            found = search.search_object(self.dbref)
+            obj = found[0] if found else None
+        if obj is None:
+            self.invalidate()
+            return None
+
+        self._ref = weakref.ref(obj)
+        return obj
+
+    def invalidate(self):
+        """Drops the cached reference. The next call re-resolves the owner."""
+        self._ref = None
+
+
+def find_object(dbid: int):
+    """
+    Finds an object by id; from the idmapper cache if it's loaded, otherwise from the
+    database. Returns None if there is no such object.
+
+    Args:
+        dbid:   The object's id
+    """
+    if dbid is None:
+        return None
+    obj = ObjectDB.get_cached_instance(dbid)
+    if obj is None:
+        found = search.search_object("#%i" % dbid)
+        obj = found[0] if found else None
+    return obj
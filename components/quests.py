@@ -71,5 +71,5 @@ class QuestHandler(BuffHandlerExtended):
     A handler for all quests and bounties. Uses the buff system under the hood, so utilizes all standard buff methods and behaviors.
     """
 
-    def __init__(self, owner=None, dbkey="quests", autopause=False):
-        super().__init__(owner, dbkey, autopause)
+    def __init__(self, owner=None, dbkey="quests", autopause=False, writebehind=False):
+        super().__init__(owner, dbkey, autopause, writebehind)
@@ -1,17 +1,19 @@
-from evennia.utils import search
+from components.owner import OwnerRef
 
 
 class SkillHandler(object):
     ownerref = None
+    _owner: OwnerRef = None
     dbkey = "skills"
     autopause = False
 
     def __init__(self, owner, dbkey=dbkey, autopause=autopause):
         self.ownerref = owner.dbref
+        self._owner = OwnerRef(owner)
         self.dbkey = dbkey
         self.autopause = autopause
 
     @property
     def owner(self):
         """The object this handler is attached to"""
-        return search.search_object(self.ownerref)[0]
+        return self._owner()
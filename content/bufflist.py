@@ -1,5 +1,7 @@
 import random
 from evennia.contrib.rpg.buffs.buff import BaseBuff, Mod
+from components.buffsextended import BaseBuffExtended
+from world.ticks import BUFF_TICKS
 
 
 class ExpireBuff(BaseBuff):
@@ -90,6 +92,7 @@ class Exploited(BaseBuff):
     unique = True
 
     mods = [Mod("total_damage", "add", 100)]
+    cacheable = False
 
     def at_post_check(self, *args, **kwargs):
         self.owner.location.msg("      + You exploit your target's weakness!")
@@ -130,7 +133,7 @@ class Leeching(BaseBuff):
         attacker.combat.heal(heal)
 
 
-class Poison(BaseBuff):
+class Poison(BaseBuffExtended):
     key = "poison"
     name = "Poison"
     flavor = "A poison wracks this body."
@@ -143,6 +146,7 @@ class Poison(BaseBuff):
 
     maxstacks = 5
     tickrate = 5
+    lazytick = True
 
     cache = {"damage": 5}
 
@@ -166,15 +170,21 @@ class Poison(BaseBuff):
         if not initial:
 
             # self.owner.location.msg_contents("Debug: buff cache - " + _s)
-            self.owner.combat.injure(
-                poison, attacker=self.source, buffcheck=False, event=False
-            )
+            BUFF_TICKS.injure(self.owner, poison, attacker=self.source)
             mesg = "Poison courses through {actor}'s body, dealing {damage} damage."
             self.owner.location.msg_contents(
                 mesg.format(actor=self.owner, damage=poison)
             )
             self.damage += 1
 
+    def at_lazy_tick(self, ticks: int, *args, **kwargs):
+        # damage grows by 1 every tick, so the accrued ticks add up to a series
+        poison = self.stacks * (ticks * self.damage + ticks * (ticks - 1) // 2)
+        BUFF_TICKS.injure(self.owner, poison, attacker=self.source)
+        mesg = "Poison courses through {actor}'s body, dealing {damage} damage."
+        self.owner.location.msg_contents(mesg.format(actor=self.owner, damage=poison))
+        self.damage += ticks
+
 
 class Overflow(BaseBuff):
     key = "overflow"
@@ -218,6 +228,7 @@ class Invulnerable(BaseBuff):
     flavor = "This character is immune to damage"
 
     mods = [Mod("injury", "custom", 0)]
+    cacheable = False
 
     def custom_modifier(self, value, *args, **kwargs):
         _value = value
@@ -72,6 +72,7 @@ class ConsecratedImmune(BaseBuffExtended):
     flavor = "Steel laid still for eons."
 
     mods = [Mod("injury", "custom", 0)]
+    cacheable = False
 
     def conditional(self, *args, **kwargs):
         eyes: ConsecratedEyes = self.handler.get("consecratedeyes")
@@ -16,6 +16,20 @@ at_server_cold_start()
 at_server_cold_stop()
 
 """
+from evennia import TICKER_HANDLER
+from evennia.utils import delay
+from components.buffsextended import flush_buffs
+from components.cooldowns import FLUSH_INTERVAL, flush_cooldowns
+from world.timers import TIMERS
+from world.scheduler import AI_SCHEDULER
+from world.aipool import AI_POOL
+from world.ticks import BUFF_TICKS
+from world.occupancy import OCCUPANCY
+from world.spawns import SPAWNS
+from world.learning import LEARN_INTERVAL, learn_all, retire_tickers
+
+OCCUPANCY_SYNC = 5
+"""Seconds after startup to rebuild the room occupancy index"""
 
 
 def at_server_init():
@@ -30,7 +44,27 @@ def at_server_start():
     This is called every time the server starts up, regardless of
     how it was shut down.
     """
-    pass
+    # flattened module prototypes, for spawning on hot paths
+    SPAWNS.load()
+
+    # the shared timing wheel for cooldowns and revives
+    TIMERS.start()
+
+    # the AI wake-up queue, and worker processes for brains that use them
+    AI_SCHEDULER.start()
+    AI_POOL.start()
+
+    # sessions resync from the portal after startup, without puppet hooks
+    delay(OCCUPANCY_SYNC, OCCUPANCY.rebuild)
+
+    # batched saves for write-behind cooldown tables
+    TICKER_HANDLER.add(
+        FLUSH_INTERVAL, flush_cooldowns, idstring="cooldown_flush", persistent=False
+    )
+
+    # one XP learn tick for all online characters
+    retire_tickers(TICKER_HANDLER)
+    TICKER_HANDLER.add(LEARN_INTERVAL, learn_all, idstring="learn", persistent=False)
 
 
 def at_server_stop():
@@ -38,7 +72,12 @@ def at_server_stop():
     This is called just before the server is shut down, regardless
     of it is for a reload, reset or shutdown.
     """
-    pass
+    AI_SCHEDULER.stop()
+    AI_POOL.stop()
+    BUFF_TICKS.stop()
+    flush_buffs()
+    flush_cooldowns()
+    TIMERS.stop()
 
 
 def at_server_reload_start():
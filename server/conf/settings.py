@@ -35,6 +35,10 @@ from evennia.settings_default import *
 SERVERNAME = "destiny"
 BASE_CHARACTER_TYPECLASS = "typeclasses.characters.PlayerCharacter"
 
+# Worker processes for AI brain evaluation (see world/aipool.py). 0 keeps all AI on the
+# main thread.
+AI_PROCESSES = 0
+
 
 ######################################################################
 # Settings given in secret_settings.py override those in this file.
@@ -11,12 +11,16 @@ import time
 import random
 from world.rules import verify_context
 from typing import TYPE_CHECKING
-from evennia.utils import utils, lazy_property
+from evennia.utils import lazy_property
 
 # Handlers
 from components.combat import CombatHandler
 from evennia.contrib.rpg.buffs.buff import BuffableProperty
-from components.buffsextended import BuffHandlerExtended
+from components.buffsextended import (
+    BuffHandlerExtended,
+    CompositeBuffHandler,
+    flush_buffs,
+)
 from components.cooldowns import CooldownHandler
 from components.events import EventHandler
 from components.quests import QuestHandler
@@ -25,9 +29,11 @@ from components.quests import QuestHandler
 import commands.default_cmdsets as default
 import commands.destiny_cmdsets as destiny
 
-from evennia import TICKER_HANDLER, DefaultCharacter
-from typeclasses.item import Item
-import evennia.prototypes.spawner as spawner
+from evennia import DefaultCharacter
+from typeclasses.item import InventoryHandler, Item, carried_by
+from world.scheduler import AI_SCHEDULER
+from world.occupancy import OCCUPANCY
+from world.learning import learn as learn_xp
 
 if TYPE_CHECKING:
     from typeclasses.npc import NPC
@@ -44,15 +50,17 @@ class Character(DefaultCharacter):
 
     @lazy_property
     def buffs(self) -> BuffHandlerExtended:
-        return BuffHandlerExtended(self, autopause=True)
+        return BuffHandlerExtended(self, autopause=True, writebehind=True)
 
     @lazy_property
     def perks(self) -> BuffHandlerExtended:
-        return BuffHandlerExtended(self, dbkey="perks", autopause=True)
+        return BuffHandlerExtended(
+            self, dbkey="perks", autopause=True, writebehind=True
+        )
 
     @lazy_property
     def cooldowns(self) -> CooldownHandler:
-        return CooldownHandler(self)
+        return CooldownHandler(self, writebehind=True)
 
     @lazy_property
     def combat(self) -> CombatHandler:
@@ -86,7 +94,48 @@ class Character(DefaultCharacter):
         self.tags.remove("attacking", category="combat")
         return super().at_init()
 
+    def at_post_move(self, source_location, **kwargs):
+        super().at_post_move(source_location, **kwargs)
+        OCCUPANCY.update(self)
+        # players wake up dormant NPCs around them
+        if self.has_account:
+            AI_SCHEDULER.wake_near(self.location)
+
+    def at_post_puppet(self, **kwargs):
+        super().at_post_puppet(**kwargs)
+        OCCUPANCY.update(self)
+        AI_SCHEDULER.wake_near(self.location)
+        # repair carried totals that drifted while nobody was looking
+        if self.ndb.carried:
+            self.ndb.carried.verify(self)
+
+    def at_post_unpuppet(self, account=None, session=None, **kwargs):
+        # save write-behind state before the character goes idle
+        self.cooldowns.flush()
+        flush_buffs(self)
+        super().at_post_unpuppet(account, session, **kwargs)
+        OCCUPANCY.update(self)
+
+    def at_object_receive(self, moved_obj, source_location, **kwargs):
+        super().at_object_receive(moved_obj, source_location, **kwargs)
+        if self.ndb.carried and isinstance(moved_obj, Item):
+            self.ndb.carried.add(moved_obj)
+
+    def at_object_leave(self, moved_obj, target_location, **kwargs):
+        super().at_object_leave(moved_obj, target_location, **kwargs)
+        if self.ndb.carried:
+            self.ndb.carried.discard(moved_obj)
+
+    def at_object_delete(self):
+        OCCUPANCY.remove(self)
+        return super().at_object_delete()
+
     # region calculated properties
+    @property
+    def carried(self):
+        """Running totals of the items this character carries."""
+        return carried_by(self)
+
     @property
     def named(self) -> str:
         if self.tags.get("named") is None:
@@ -106,11 +155,17 @@ class Character(DefaultCharacter):
         context: object = None,
         trigger: bool = False,
         strongest: bool = False,
+        held: bool = False,
     ):
-        _value = value
-        _value = self.buffs.check(_value, stat, loud, context, trigger, strongest)
-        _value = self.perks.check(_value, stat, loud, context, trigger, strongest)
-        return _value
+        """Checks a stat against this character's buffs and perks in a single pass.
+        If `held` is True, the buffs and perks of the held weapon are included too."""
+        handlers = [self.buffs, self.perks]
+        if held:
+            weapon = self.attributes.get("held", None)
+            if weapon:
+                handlers += [weapon.buffs, weapon.perks]
+        composite = CompositeBuffHandler(*handlers)
+        return composite.check(value, stat, loud, context, trigger, strongest)
 
     # endregion
 
@@ -156,15 +211,16 @@ class PlayerCharacter(Character):
 
     @lazy_property
     def quests(self) -> QuestHandler:
-        return QuestHandler(self, dbkey="quests")
+        return QuestHandler(self, dbkey="quests", writebehind=True)
+
+    @lazy_property
+    def inv(self) -> InventoryHandler:
+        return InventoryHandler(self)
 
     def at_object_creation(self):
         self.cmdset.add(destiny.DestinyBasicCmdSet, persistent=True)
         self.cmdset.add(destiny.DestinyBuilderCmdSet, persistent=True)
 
-        # TickerHandler that fires off the "learn" function
-        TICKER_HANDLER.add(15, self.learn)
-
         # Are you a "Named" character? Players start out as true.
         self.tags.add("named")
 
@@ -186,14 +242,7 @@ class PlayerCharacter(Character):
     @property
     def weight(self):
         """The character's current weight, taking into account all held items."""
-        _weight = 0
-
-        for x in self.contents:
-            if utils.inherits_from(x, Item):
-                x: Item
-                _weight += x.db.weight
-
-        return _weight
+        return self.carried.weight
 
     @property
     def level(self):
@@ -209,28 +258,9 @@ class PlayerCharacter(Character):
         self.db.permxp += xp
 
     def learn(self, xp=0):
-        """Converts temporary XP to permanent XP"""
-        # get the variables
-        xp, learn = self.db.xp, self.learning
-        to_learn = xp if learn >= xp else learn
-
-        # apply the learning
-        self.db.permxp += to_learn
-        self.db.xp -= to_learn
-
-        # messaging
-        if to_learn:
-            # self.msg("Debug: {num} XP gained".format(num=to_learn))
-            pass
-
-        # default level-up
-        if self.db.permxp >= 1000:
-            self.db.permxp -= 1000
-            self.msg("You feel stronger...")
-            objs = spawner.spawn("WORLD_DROP")
-            for obj in objs:
-                obj.move_to(self.location, True)
-                obj.location.msg_contents("An engram coalesces from strands of energy!")
+        """Converts temporary XP to permanent XP. Online characters learn on the
+        global tick in `world.learning`."""
+        return learn_xp(self)
 
     def get_display_name(self, looker=None, **kwargs):
         supername = super().get_display_name(looker, **kwargs)
@@ -1,6 +1,7 @@
 from world import loot
-import evennia.prototypes.spawner as spawner
+from world.spawns import SPAWNS
 from evennia import CmdSet, Command as BaseCommand, DefaultObject
+from evennia.utils.dbserialize import deserialize
 from typeclasses.item import Item
 
 
@@ -54,8 +55,9 @@ class CmdGuess(BaseCommand):
     def func(self):
         caller = self.caller
         engram: Engram = self.obj
-        drop = dict(engram.db.drop)
-        correct_answer = drop["key"]
+        drop = engram.drop
+        # engrams rolling on a loot table can't be guessed ahead of time
+        correct_answer = drop.get("key") if isinstance(drop, dict) else None
 
         if not engram.tags.has("guessed") and self.args:
             caller.msg("You guessed: " + self.args)
@@ -72,9 +74,19 @@ class Engram(Item):
         self.cmdset.add(EngramCmdSet, permanent=True)
         pass
 
+    @property
+    def drop(self):
+        """This engram's drop, decoupled from the database: a prototype key or dictionary,
+        or a loot table of prototypes (a LootTable or a list of (prototype, weight) tuples)."""
+        return deserialize(self.db.drop)
+
     def decrypt(self):
-        drop = self.db.drop
-        objs = spawner.spawn(drop)
+        """Spawns this engram's drop. The drop is either a prototype, or a loot table of
+        prototypes (a LootTable or a list of (prototype, weight) tuples) to roll on."""
+        drop = self.drop
+        if isinstance(drop, (list, tuple, loot.LootTable)):
+            drop = loot.roll_on_table(drop)
+        objs = SPAWNS.spawn(drop)
         for obj in objs:
             obj.move_to(self.location, True)
             obj.location.msg_contents("A {obj} forms out of thin air!".format(obj=obj))
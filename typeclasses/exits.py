@@ -6,11 +6,22 @@ set and has a single command defined on itself with the same name as its key,
 for allowing Characters to traverse the exit to its destination.
 
 """
+from evennia.locks.lockhandler import LockHandler
 from evennia.objects.objects import DefaultExit
+from evennia.utils import lazy_property
 
+from world.graph import ROOM_GRAPH
 from .objects import ObjectParent
 
 
+class ExitLockHandler(LockHandler):
+    """A lock handler which drops the cached room graph whenever its exit is relocked."""
+
+    def _save_locks(self):
+        super()._save_locks()
+        ROOM_GRAPH.invalidate(self.obj.location)
+
+
 class Exit(ObjectParent, DefaultExit):
     """
     Exits are connectors between rooms. Exits are normal Objects except
@@ -35,6 +46,40 @@ class Exit(ObjectParent, DefaultExit):
         at_failed_traverse(traveller) - called by at_traverse if traversal failed for some reason. Will
                                         not be called if the attribute `err_traverse` is
                                         defined, in which case that will simply be echoed.
+
+    Creating, deleting, moving, relocking, linking or unlinking an exit drops the cached
+    room graph (see `world.graph`).
     """
 
-    pass
+    @lazy_property
+    def locks(self) -> ExitLockHandler:
+        return ExitLockHandler(self)
+
+    @property
+    def destination(self):
+        return DefaultExit.destination.fget(self)
+
+    @destination.setter
+    def destination(self, value):
+        DefaultExit.destination.fset(self, value)
+        ROOM_GRAPH.invalidate(self.location)
+
+    @destination.deleter
+    def destination(self):
+        DefaultExit.destination.fdel(self)
+        ROOM_GRAPH.invalidate(self.location)
+
+    def at_object_creation(self):
+        super().at_object_creation()
+        ROOM_GRAPH.invalidate()
+
+    def at_object_delete(self):
+        ROOM_GRAPH.invalidate(self.location)
+        return super().at_object_delete()
+
+    def at_post_move(self, source_location, **kwargs):
+        super().at_post_move(source_location, **kwargs)
+        if source_location:
+            ROOM_GRAPH.invalidate(source_location)
+        if self.location:
+            ROOM_GRAPH.invalidate(self.location)
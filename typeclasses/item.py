@@ -1,7 +1,42 @@
+from evennia.typeclasses.attributes import AttributeHandler, ModelAttributeBackend
+from evennia.utils import lazy_property, logger, make_iter
 from typeclasses.objects import Object
 
+CARRY_ATTRS = ("weight", "bulk")
+"""The item attributes which count towards what their carrier is carrying"""
+DEFAULT_BULK = 1
+"""The bulk of an item with no bulk attribute"""
+
+
+class ItemAttributeHandler(AttributeHandler):
+    """An attribute handler which updates its item's carrier whenever the item's
+    weight or bulk changes."""
+
+    def add(self, key, value, *args, **kwargs):
+        super().add(key, value, *args, **kwargs)
+        if key and key.strip().lower() in CARRY_ATTRS:
+            _refresh(self.obj)
+
+    def batch_add(self, *args, **kwargs):
+        super().batch_add(*args, **kwargs)
+        if any(str(arg[0]).strip().lower() in CARRY_ATTRS for arg in args):
+            _refresh(self.obj)
+
+    def remove(self, key=None, *args, **kwargs):
+        super().remove(key, *args, **kwargs)
+        if key is None or any(k.strip().lower() in CARRY_ATTRS for k in make_iter(key)):
+            _refresh(self.obj)
+
+    def clear(self, *args, **kwargs):
+        super().clear(*args, **kwargs)
+        _refresh(self.obj)
+
 
 class Item(Object):
+    @lazy_property
+    def attributes(self) -> ItemAttributeHandler:
+        return ItemAttributeHandler(self, ModelAttributeBackend)
+
     def at_before_get(self, getter, **kwargs):
         return super().at_before_get(getter, **kwargs)
 
@@ -12,6 +47,95 @@ class Item(Object):
         self.db.weight = 1
         self.db.stacking = False
 
+    def at_object_delete(self):
+        carried = self.location.ndb.carried if self.location else None
+        if carried:
+            carried.discard(self)
+        return super().at_object_delete()
+
+
+class Carried(object):
+    """
+    Running totals of the items an object carries, so weight checks don't add up its
+    contents every time. Kept up to date by the carrier's `at_object_receive` and
+    `at_object_leave` hooks, and by items when their weight or bulk changes.
+
+    Attrs:
+        items:  The (weight, bulk) each carried item counts for, by item id
+        weight: The total weight carried
+        bulk:   The total bulk carried
+    """
+
+    def __init__(self, items=()) -> None:
+        self.items = {}
+        self.weight = 0
+        self.bulk = 0
+        for item in items:
+            self.add(item)
+
+    @classmethod
+    def tally(cls, carrier) -> "Carried":
+        """Adds up the items in a carrier's contents."""
+        return cls(x for x in carrier.contents if isinstance(x, Item))
+
+    def add(self, item):
+        """Starts counting an item, or recounts it if it's already counted."""
+        self.discard(item)
+        weight, bulk = item.attributes.get(key=list(CARRY_ATTRS))
+        counts = (weight or 0, DEFAULT_BULK if bulk is None else bulk)
+        self.items[item.id] = counts
+        self.weight += counts[0]
+        self.bulk += counts[1]
+
+    def discard(self, item):
+        """Stops counting an item."""
+        counts = self.items.pop(item.id, None)
+        if counts:
+            self.weight -= counts[0]
+            self.bulk -= counts[1]
+
+    def refresh(self, item):
+        """Recounts an item, if it's counted."""
+        if item.id in self.items:
+            self.add(item)
+
+    def verify(self, carrier) -> bool:
+        """
+        Checks the totals against the carrier's contents, and repairs them if they've
+        drifted (for example, if something moved without calling hooks).
+
+        Args:
+            carrier:    The object these are the totals of
+
+        Returns True if the totals were correct.
+        """
+        fresh = Carried.tally(carrier)
+        if fresh.items == self.items:
+            return True
+        logger.log_warn(
+            "Carried totals of %s were off: weight %s, bulk %s (should be %s, %s)."
+            % (carrier.dbref, self.weight, self.bulk, fresh.weight, fresh.bulk)
+        )
+        self.items, self.weight, self.bulk = fresh.items, fresh.weight, fresh.bulk
+        return False
+
+
+def carried_by(carrier) -> Carried:
+    """Returns the running totals of what an object carries, adding them up once if
+    they haven't been yet."""
+    totals = carrier.ndb.carried
+    if totals is None:
+        totals = carrier.ndb.carried = Carried.tally(carrier)
+    return totals
+
+
+def _refresh(item):
+    """Recounts an item on its carrier, if the carrier's totals are in use"""
+    location = item.location
+    totals = location.ndb.carried if location else None
+    if totals:
+        totals.refresh(item)
+
 
 class InventoryHandler(object):
     obj = None
@@ -42,17 +166,19 @@ class InventoryHandler(object):
 
     @property
     def encumberance(self):
-        """The character's current encumberance; added weight of all items carried."""
-        _weight = 0
+        """The character's current encumberance; added weight of all items carried,
+        except equipped ones."""
+        totals = carried_by(self.obj)
+        _weight = totals.weight
 
-        for x in self.obj.contents:
-            if x.is_typeclass(Item):
-                if x not in self.armor and x not in self.weapons:
-                    _weight += x.db.weight
+        slots = list(self.obj.db.weapons.values()) + list(self.obj.db.armor.values())
+        for x in slots:
+            if x and x.id in totals.items:
+                _weight -= totals.items[x.id][0]
 
         return _weight
 
     @property
     def bulk(self):
         """The character's current "bulk"; that is, the total size of the items they carry"""
-        return
+        return carried_by(self.obj).bulk
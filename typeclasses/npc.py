@@ -13,7 +13,7 @@ DEFAULT_NPC_MESSAGING = {
 }
 
 
-@dataclass
+@dataclass(slots=True)
 class NPCWeapon(WeaponStats):
     pass
 
@@ -7,6 +7,7 @@ Rooms are simple containers that has no location of their own.
 
 from evennia.objects.objects import DefaultRoom
 
+from world import output
 from .objects import ObjectParent
 
 
@@ -19,6 +20,20 @@ class Room(ObjectParent, DefaultRoom):
 
     See examples/object.py for a list of
     properties and methods available on all Objects.
+
+    While an output buffer is open for the room (see `world.output`), plain
+    messages are collected and sent as one message per recipient when it flushes.
     """
 
-    pass
+    def msg_contents(self, text=None, exclude=None, from_obj=None, mapping=None, **kwargs):
+        buffer = output.buffer_for(self)
+        if buffer:
+            # only plain, pre-formatted strings can be batched
+            plain = isinstance(text, str) and not (from_obj or mapping or kwargs)
+            if plain and "$" not in text and "{" not in text:
+                buffer.add(text, exclude)
+                return
+            buffer.flush()
+        return super().msg_contents(
+            text, exclude=exclude, from_obj=from_obj, mapping=mapping, **kwargs
+        )
@@ -2,7 +2,7 @@ import random
 import time
 import inflect
 from typing import TYPE_CHECKING
-from components.context import congen
+from components.context import ContextView
 from evennia.typeclasses.attributes import AttributeProperty
 from evennia.typeclasses.tags import TagHandler
 
@@ -11,7 +11,8 @@ import components.combat as com
 from components.combat import CombatHandler, WeaponStats, OffenseStats
 from typeclasses.objects import Object
 from evennia.contrib.rpg.buffs.buff import BaseBuff, BuffableProperty
-from components.buffsextended import BuffHandlerExtended
+from components.buffsextended import BaseBuffExtended, BuffHandlerExtended
+from world.ticks import BUFF_TICKS
 from evennia.utils import lazy_property, utils
 from commands.command import Command as BaseCommand
 from evennia import CmdSet
@@ -48,7 +49,7 @@ class FusionCharging(BaseBuff):
         pass
 
 
-class FusionCharged(BaseBuff):
+class FusionCharged(BaseBuffExtended):
     key = "fusioncharged"
 
     duration = 5
@@ -67,7 +68,7 @@ class FusionCharged(BaseBuff):
         message = "Your {0} explodes, filling your lungs with searing plasma!"
         formatted = message.format(self.owner)
         player.msg(formatted)
-        player.combat.injure(damage, player, buffcheck=False, event=False)
+        BUFF_TICKS.injure(player, damage, player)
 
     def at_tick(self, *args, **kwargs):
         ticknum = self.ticknum
@@ -214,11 +215,11 @@ class Weapon(Object):
 
     @lazy_property
     def buffs(self) -> BuffHandlerExtended:
-        return BuffHandlerExtended(self)
+        return BuffHandlerExtended(self, writebehind=True)
 
     @lazy_property
     def perks(self) -> BuffHandlerExtended:
-        return BuffHandlerExtended(self, dbkey="perks")
+        return BuffHandlerExtended(self, dbkey="perks", writebehind=True)
 
     # ammo
     mag = BuffableProperty(10)
@@ -393,9 +394,8 @@ class Weapon(Object):
         combat = attacker.combat.weapon_attack(weapon, defender)
 
         # context cleanup and messaging
-        mapping = congen([combat])
-        mapping.update({"weapon": self.get_display_name()})
-        formatted = rdy_msg.format(**mapping)
+        mapping = ContextView({"weapon": self.get_display_name()}, combat)
+        formatted = rdy_msg.format_map(mapping)
         attacker.cooldowns.add(
             "global",
             weapon.cooldown,
@@ -0,0 +1,166 @@
+"""
+AI pool
+
+Optional process-pool evaluation for brains. Instead of running `at_think` on the
+main thread, an opted-in brain (see `world.snapshots`) has a snapshot of the world
+around its NPC taken, which is evaluated in a worker process. The decision comes back
+to the main thread, where the brain's `at_evaluate` hook turns it into queued
+behaviors with `BrainHandler.enqueue`.
+
+The pool is off unless `settings.AI_PROCESSES` is above 0. It is started and stopped
+from `server/conf/at_server_startstop.py`.
+"""
+import importlib
+from concurrent.futures import ProcessPoolExecutor
+from django.conf import settings
+from twisted.internet import reactor
+from evennia.utils import logger
+from components.owner import OwnerRef
+from world.graph import ROOM_GRAPH
+from world.occupancy import OCCUPANCY
+from world.snapshots import Snapshot
+
+
+class AIPool(object):
+    """
+    A process pool for brain evaluation.
+
+    Attrs:
+        workers:    The number of worker processes; 0 when the pool is off
+        pending:    The token of each NPC's evaluation in flight, by NPC id
+    """
+
+    def __init__(self) -> None:
+        self.workers = 0
+        self.pending = {}
+        self._executor = None
+        self._counter = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self._executor is not None
+
+    def start(self, workers: int = None):
+        """
+        Starts the worker processes.
+
+        Args:
+            workers:    (optional) The number of workers. Defaults to settings.AI_PROCESSES
+        """
+        if workers is None:
+            workers = getattr(settings, "AI_PROCESSES", 0)
+        if self._executor or not workers:
+            return
+        self.workers = workers
+        self._executor = ProcessPoolExecutor(max_workers=workers)
+
+    def stop(self):
+        """Stops the worker processes. Evaluations in flight are dropped."""
+        if self._executor:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+        self._executor = None
+        self.workers = 0
+        self.pending = {}
+
+    def submit(self, handler) -> bool:
+        """
+        Sends a brain's evaluation to the pool.
+
+        Args:
+            handler:    The BrainHandler of the NPC to evaluate
+
+        Returns True if the evaluation was sent, or False if the pool is off or the
+        brain hasn't opted in, in which case the brain should think normally.
+        """
+        brain = handler.brain
+        if not self._executor or not brain.evaluator:
+            return False
+        owner = handler.owner
+        snapshot = take_snapshot(owner, brain)
+
+        # only the latest evaluation for an NPC is delivered
+        self._counter += 1
+        token = self._counter
+        self.pending[owner.id] = token
+
+        future = self._executor.submit(_evaluate, brain.evaluator, snapshot)
+        ref = OwnerRef(owner)
+        future.add_done_callback(
+            lambda f: reactor.callFromThread(self._deliver, ref, token, f)
+        )
+        return True
+
+    def _deliver(self, ref: OwnerRef, token: int, future):
+        """Hands a finished evaluation to its brain, on the main thread"""
+        obj = ref()
+        if not obj or self.pending.get(obj.id) != token:
+            return
+        del self.pending[obj.id]
+        if future.cancelled():
+            return
+        try:
+            decision = future.result()
+            obj.ai.brain.at_evaluate(decision)
+        except Exception:
+            logger.log_trace("AI evaluation failed for %s." % ref.dbref)
+
+
+def take_snapshot(npc, brain) -> Snapshot:
+    """
+    Takes a snapshot of the world around an NPC, with the fields its brain asks for.
+
+    Args:
+        npc:    The NPC
+        brain:  The NPC's brain; its `snapshot_fields` and `search_range` are used
+    """
+    room = npc.location
+    fields = brain.snapshot_fields
+    distance = getattr(brain, "search_range", 1)
+    target = getattr(brain, "target", None)
+    data = {
+        "npc": npc.id,
+        "room": room.id if room else None,
+        "target": target.id if target else None,
+        "dead": npc.tags.has("dead", category="combat"),
+        "range": distance,
+    }
+    if room and ("occupancy" in fields or "exits" in fields):
+        reachable = ROOM_GRAPH.distances(room, npc, distance)
+        if "occupancy" in fields:
+            data["occupancy"] = tuple(
+                (roomid, tuple(OCCUPANCY.rooms[roomid]))
+                for roomid in reachable
+                if roomid in OCCUPANCY.rooms
+            )
+        if "exits" in fields:
+            data["exits"] = tuple(
+                (roomid, _edges(place, npc))
+                for roomid, (steps, _, place) in reachable.items()
+                if steps < distance
+            )
+    if "hp" in fields:
+        npc.combat.settle()
+        data["hp"] = (npc.db.hp, npc.maxhp)
+    if "cooldowns" in fields:
+        cooldowns = npc.cooldowns
+        timeleft = ((key, cooldowns.time_left(key)) for key in list(cooldowns.db))
+        data["cooldowns"] = tuple((key, left) for key, left in timeleft if left)
+    return Snapshot(**data)
+
+
+def _edges(room, npc) -> tuple:
+    """The (exit id, destination id) pairs of the exits out of a room an NPC can take"""
+    return tuple(
+        (exi.id, exi.db_destination_id)
+        for exi in ROOM_GRAPH.passable(room, npc)
+        if exi.db_destination_id
+    )
+
+
+def _evaluate(path: str, snapshot: Snapshot) -> dict:
+    """Runs an evaluator in a worker process"""
+    module, _, name = path.rpartition(".")
+    return getattr(importlib.import_module(module), name)(snapshot)
+
+
+AI_POOL = AIPool()
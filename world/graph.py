@@ -0,0 +1,223 @@
+"""
+Graph
+
+A cache of the room graph (rooms, their exits and where those lead) with the results
+of traverse lock checks, and a pathfinder on top of it. NPCs look for exits and
+track targets through here instead of walking `room.exits` and evaluating locks on
+every think.
+
+The cached exits and paths are dropped whenever an exit is created, deleted, moved,
+relocked, linked or unlinked (see `typeclasses/exits.py`). Cached exits are also kept
+against their destinations, and lock results against the exit's lock string, so
+destinations and locks written some other way are picked up the next time they're
+checked.
+
+Rooms have no coordinates to guide an A* search, and every exit costs the same, so
+paths are found with a breadth-first search. Searches from a room are cached as
+distance maps until the graph changes.
+
+```python
+from world.graph import ROOM_GRAPH
+
+exits = ROOM_GRAPH.passable(room, npc)
+route = ROOM_GRAPH.path(room, goal, npc)
+```
+"""
+from collections import deque
+
+MAX_MAPS = 1024
+"""The most distance maps kept at once; the cache is cleared when it fills up"""
+
+
+class RoomGraph(object):
+    """
+    The cached room graph.
+
+    Attrs:
+        edges:      (exit, destination id) of the exits leading out of each room, by room id
+        access:     (lock string, result) of traverse checks, by (exit id, accessor id)
+        maps:       Cached distance maps, by (room id, accessor id, range)
+        version:    Goes up every time the graph changes
+    """
+
+    def __init__(self) -> None:
+        self.edges = {}
+        self.access = {}
+        self.maps = {}
+        self.version = 0
+
+    # region methods
+    def exits(self, room) -> list:
+        """
+        Returns the exits leading out of a room.
+
+        Args:
+            room:   The room
+        """
+        found = self.edges.get(room.id)
+        if found is not None and any(e.db_destination_id != dest for e, dest in found):
+            # relinked or unlinked; paths through this room may have changed
+            self.invalidate(room)
+            found = None
+        if found is None:
+            found = self.edges[room.id] = [
+                (e, e.db_destination_id) for e in room.exits if e.db_destination_id
+            ]
+        return [exi for exi, _ in found]
+
+    def can_traverse(self, exi, accessor) -> bool:
+        """
+        Checks if an object passes an exit's traverse lock. The result is cached until
+        the exit's locks change.
+
+        Args:
+            exi:        The exit
+            accessor:   The object trying to traverse it
+        """
+        key = (exi.id, accessor.id)
+        lockstring = exi.db_lock_storage
+        cached = self.access.get(key)
+        if cached and cached[0] == lockstring:
+            return cached[1]
+        if cached:
+            # relocked; paths through this exit may have changed
+            self._changed()
+        result = bool(exi.access(accessor, "traverse"))
+        self.access[key] = (lockstring, result)
+        return result
+
+    def passable(self, room, accessor=None) -> list:
+        """
+        Returns the exits out of a room which an object can traverse.
+
+        Args:
+            room:       The room
+            accessor:   (optional) The object trying to leave. If None, all exits
+        """
+        exits = self.exits(room)
+        if accessor is None:
+            return exits
+        return [exi for exi in exits if self.can_traverse(exi, accessor)]
+
+    def distances(self, room, accessor=None, distance: int = None) -> dict:
+        """
+        Finds every room reachable from a room.
+
+        Args:
+            room:       The room to start from
+            accessor:   (optional) The object moving; exits it can't traverse are skipped
+            distance:   (optional) How many exits to follow at most. Unlimited by default
+
+        Returns a dictionary of room id: (distance, first exit, room), where the first
+        exit is the exit out of the starting room which leads there (None for the room
+        itself)
+        """
+        key = (room.id, accessor.id if accessor else None, distance)
+        cached = self.maps.get(key)
+        if cached and cached[0] == self.version:
+            return cached[1]
+
+        found = {room.id: (0, None, room)}
+        frontier = deque([room])
+        while frontier:
+            place = frontier.popleft()
+            steps, first, _ = found[place.id]
+            if distance is not None and steps >= distance:
+                continue
+            for exi in self.passable(place, accessor):
+                dest = exi.destination
+                if dest is None or dest.id in found:
+                    continue
+                found[dest.id] = (steps + 1, first or exi, dest)
+                frontier.append(dest)
+
+        if len(self.maps) >= MAX_MAPS:
+            self.maps = {}
+        self.maps[key] = (self.version, found)
+        return found
+
+    def rooms_within(self, room, distance: int) -> list:
+        """
+        Returns all rooms within a number of exits of a room, regardless of locks.
+        Includes the room itself.
+
+        Args:
+            room:       The room to start from
+            distance:   How many exits to follow
+        """
+        return [found[2] for found in self.distances(room, None, distance).values()]
+
+    def path(self, room, goal, accessor=None, distance: int = None) -> list:
+        """
+        Finds the shortest route between two rooms.
+
+        Args:
+            room:       The room to start from
+            goal:       The room to reach
+            accessor:   (optional) The object moving; exits it can't traverse are skipped
+            distance:   (optional) How many exits the route may be at most
+
+        Returns a list of exits to take in order, or None if the goal can't be reached
+        """
+        route = []
+        place = room
+        while place.id != goal.id:
+            found = self.distances(place, accessor, distance).get(goal.id)
+            if not found:
+                return None
+            exi = found[1]
+            if exi.destination is None:
+                # unlinked since the distance map was built
+                self.invalidate(place)
+                continue
+            route.append(exi)
+            place = exi.destination
+            if distance is not None:
+                distance -= 1
+        return route
+
+    def nearest(self, room, rooms, accessor=None, distance: int = None):
+        """
+        Finds the closest of a collection of rooms.
+
+        Args:
+            room:       The room to start from
+            rooms:      The ids of the rooms to look for
+            accessor:   (optional) The object moving; exits it can't traverse are skipped
+            distance:   (optional) How many exits away to look
+
+        Returns a tuple of (room, distance, first exit), or None if none are reachable
+        """
+        reachable = self.distances(room, accessor, distance)
+        best = None
+        for roomid in rooms:
+            found = reachable.get(roomid)
+            if found and (best is None or found[0] < best[1]):
+                best = (found[2], found[0], found[1])
+        return best
+
+    def invalidate(self, room=None):
+        """
+        Drops cached exits, and all distance maps.
+
+        Args:
+            room:   (optional) The room whose exits changed. All rooms if None
+        """
+        if room is None:
+            self.edges = {}
+        else:
+            self.edges.pop(room.id, None)
+        self._changed()
+
+    # endregion
+
+    # region private methods
+    def _changed(self):
+        """Marks all distance maps as out of date"""
+        self.version += 1
+        self.maps = {}
+
+    # endregion
+
+
+ROOM_GRAPH = RoomGraph()
@@ -0,0 +1,114 @@
+"""
+Learning
+
+The XP learn tick. Every `LEARN_INTERVAL` seconds, one pass converts temporary XP to
+permanent XP for every online character, instead of each player character keeping
+its own ticker. Characters are found through their sessions, so offline characters
+are never loaded. Each character's XP attributes are read and written in one batch,
+and the engrams earned by everyone who levels up are spawned together, from the
+spawn cache (see `world.spawns`).
+
+The tick is registered from `server/conf/at_server_startstop.py`.
+
+```python
+from world.learning import learn
+
+learn(character)
+```
+"""
+from evennia.utils import logger, utils
+from world.spawns import SPAWNS
+
+LEARN_INTERVAL = 15
+"""How often online characters learn, in seconds"""
+LEVEL_XP = 1000
+"""The permanent XP needed for a level-up"""
+LEVEL_DROP = "WORLD_DROP"
+"""The prototype spawned for a character who levels up"""
+
+
+def learn(obj, drop=True) -> bool:
+    """
+    Converts a character's temporary XP to permanent XP, up to its `learning` rate.
+
+    Args:
+        obj:    The character
+        drop:   (default: True) Spawn the level-up engram right away. If False, the
+                caller spawns it with `level_up`
+
+    Returns True if the character leveled up.
+    """
+    xp, permxp = obj.attributes.get(key=["xp", "permxp"])
+    xp, permxp = xp or 0, permxp or 0
+    to_learn = min(xp, obj.learning)
+
+    leveled = permxp + to_learn >= LEVEL_XP
+    if not to_learn and not leveled:
+        return False
+
+    permxp += to_learn
+    if leveled:
+        permxp -= LEVEL_XP
+    obj.attributes.batch_add(("xp", xp - to_learn), ("permxp", permxp))
+
+    if leveled:
+        obj.msg("You feel stronger...")
+        if drop:
+            level_up([obj])
+    return leveled
+
+
+def level_up(objs: list):
+    """
+    Spawns level-up engrams for several characters at once, at their locations.
+
+    Args:
+        objs:   The characters who leveled up
+    """
+    objs = [obj for obj in objs if obj.location]
+    if not objs:
+        return
+    drops = SPAWNS.spawn_many(LEVEL_DROP, len(objs))
+    for obj, engram in zip(objs, drops):
+        engram.move_to(obj.location, True)
+        obj.location.msg_contents("An engram coalesces from strands of energy!")
+
+
+def learn_all():
+    """Runs the learn tick for every online character."""
+    leveled = []
+    for obj in online_learners():
+        try:
+            if learn(obj, drop=False):
+                leveled.append(obj)
+        except Exception:
+            logger.log_trace("Learn tick failed for %s." % obj.dbref)
+    level_up(leveled)
+
+
+def online_learners() -> list:
+    """Returns the puppeted characters which learn, each once."""
+    sessions = utils.variable_from_module(
+        "evennia.server.sessionhandler", "SESSION_HANDLER"
+    )
+    found = {}
+    for session in sessions.get_sessions():
+        puppet = session.get_puppet()
+        if puppet and puppet.id not in found and hasattr(puppet, "learning"):
+            found[puppet.id] = puppet
+    return list(found.values())
+
+
+def retire_tickers(ticker_handler):
+    """
+    Removes the per-character learn tickers older characters were created with.
+
+    Args:
+        ticker_handler: The TickerHandler
+    """
+    for entry in ticker_handler.all_display():
+        obj, callfunc, interval, idstring, persistent = (
+            entry[0], entry[1], entry[3], entry[4], entry[5]
+        )
+        if obj and callfunc == "learn":
+            ticker_handler.remove(interval, obj.learn, idstring, persistent)
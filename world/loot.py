@@ -17,18 +17,129 @@ class NPCStub:
     """
 
 
+class LootTable(object):
+    """
+    A loot table compiled once into an alias table, for constant-time rolls. Takes the
+    same list of (value, weight) tuples as `roll_on_table`.
+
+    Args:
+        table:  A list of (value, weight) tuples. Entries with no weight never drop
+        skew:   (default: 0) Skews every weight towards the table's mean weight by a
+                percentage (0 to 1.0); see `skewed_roll_on_table`
+        seed:   (optional) A seed, for reproducible rolls
+
+    Usage:
+
+    ```python
+    SLOT1 = LootTable([(pl.ExploitPerk, 5), (pl.RampagePerk, 5)])
+    perk = SLOT1.roll()
+    drops = SLOT1.roll_many(10)
+    ```
+    """
+
+    def __init__(self, table: list, skew: float = 0.0, seed=None) -> None:
+        self.table = list(table)
+        self.skew = skew
+        self.random = random.Random(seed)
+
+        # skew towards the mean, over the whole table
+        weights = [weight for _, weight in self.table]
+        if skew and weights:
+            avg = sum(weights) / len(weights)
+            weights = [weight + (avg - weight) * skew for weight in weights]
+
+        entries = [(v, w) for (v, _), w in zip(self.table, weights) if w > 0]
+        self.values = [v for v, _ in entries]
+        self.weights = [w for _, w in entries]
+        self.prob, self.alias = _alias(self.weights)
+
+    def __len__(self):
+        return len(self.values)
+
+    def roll(self):
+        """Rolls on the table once. Returns None if nothing in the table can drop."""
+        count = len(self.values)
+        if not count:
+            return None
+        rand = self.random.random
+        index = int(rand() * count)
+        if rand() < self.prob[index]:
+            return self.values[index]
+        return self.values[self.alias[index]]
+
+    def roll_many(self, count: int) -> list:
+        """
+        Rolls on the table a number of times.
+
+        Args:
+            count:  The number of rolls
+
+        Returns a list of results, in roll order
+        """
+        size = len(self.values)
+        if not size:
+            return [None] * count
+        rand, prob, alias, values = self.random.random, self.prob, self.alias, self.values
+        results = []
+        for _ in range(count):
+            index = int(rand() * size)
+            results.append(values[index] if rand() < prob[index] else values[alias[index]])
+        return results
+
+    def chance(self, value) -> float:
+        """Returns the chance of a single roll dropping the value."""
+        total = sum(self.weights)
+        found = sum(w for v, w in zip(self.values, self.weights) if v == value)
+        return found / total if total else 0.0
+
+    def seed(self, value=None):
+        """
+        Reseeds this table's rolls.
+
+        Args:
+            value:  The seed. Reseeds from system entropy if None
+        """
+        self.random.seed(value)
+
+
+def _alias(weights: list) -> tuple:
+    """Builds the probability and alias lists of Vose's alias method"""
+    count = len(weights)
+    total = sum(weights)
+    if not count or total <= 0:
+        return [], []
+    scaled = [w * count / total for w in weights]
+    prob, alias = [0.0] * count, [0] * count
+    small = [i for i, p in enumerate(scaled) if p < 1.0]
+    large = [i for i, p in enumerate(scaled) if p >= 1.0]
+    while small and large:
+        less, more = small.pop(), large.pop()
+        prob[less], alias[less] = scaled[less], more
+        scaled[more] = scaled[more] + scaled[less] - 1.0
+        if scaled[more] < 1.0:
+            small.append(more)
+        else:
+            large.append(more)
+    # whatever is left is 1, give or take float error
+    for i in large + small:
+        prob[i], alias[i] = 1.0, i
+    return prob, alias
+
+
+PERK_SLOT1 = LootTable([(pl.ExploitPerk, 5), (pl.RampagePerk, 5), (pl.LeechRoundPerk, 5)])
+
+
 class TestWeapon(Weapon):
     def roll_perks(self, perks, slot):
-        _toApply = roll_on_table(perks)
+        table = perks if isinstance(perks, LootTable) else LootTable(perks)
+        _toApply = table.roll()
         self.perks.add(_toApply, slot)
 
     def at_object_creation(self):
         "Called when object is first created"
         super().at_object_creation()
 
-        slot1 = [(pl.ExploitPerk, 5), (pl.RampagePerk, 5), (pl.LeechRoundPerk, 5)]
-
-        self.roll_perks(slot1, "slot1")
+        self.roll_perks(PERK_SLOT1, "slot1")
 
         # Ammo stats
         self.db.ammo = 30
@@ -79,40 +190,18 @@ def roll(chance: float):
 
 
 def roll_on_table(table: list):
-    """Takes a list of tuples with the format (value, chance) and rolls to find which one to return. Guaranteed to return a value."""
-    _total = 0
-    for x in table:
-        _total += x[1]
-
-    for x in table:
-        if roll(x[1] / _total):
-            return x[0]
-        else:
-            _total -= x[1]
+    """Takes a list of tuples with the format (value, chance) and rolls to find which one to return. Guaranteed to return a value.
+    Tables rolled on more than once should be compiled into a LootTable instead."""
+    if isinstance(table, LootTable):
+        return table.roll()
+    return LootTable(table).roll()
 
 
 def skewed_roll_on_table(table: list, skew: float):
     """Takes a list of tuples with the format (value, chance) and rolls to find which one to return. Guaranteed to return a value.
-    Skews the result towards the table's mean weight by a percentage (0 to 1.0)."""
-    # Setting up collected values beforehand
-    total = 0
-    for x in table:
-        total += x[1]
-    avg = total / len(table)
-
-    for x in table:
-        # Separating out probability calculations for clarity
-        weight = x[1]  # The unmodified weight of the loot roll
-        dist = avg - weight  # The distance from the unmodified weight to the mean
-        devi = weight + (
-            dist * skew
-        )  # The deviation towards the mean to modify the weight by
-        chance = devi / total  # The new, modified chance to roll
-
-        if roll(chance):
-            return x[0]
-        else:
-            total -= x[1]
+    Skews the result towards the table's mean weight by a percentage (0 to 1.0).
+    Tables rolled on more than once should be compiled into a LootTable instead."""
+    return LootTable(table, skew).roll()
 
 
 def parse_result(obj, location):
@@ -0,0 +1,113 @@
+"""
+Occupancy
+
+A per-room index of the characters NPCs can target: puppeted, not superusers, and not
+dead. AI target scans look rooms up here instead of walking their contents and
+querying tags on every object.
+
+The index is kept up to date by the hooks that change any of those things:
+movement, puppeting and unpuppeting (see `typeclasses/characters.py`), and death and
+revival (see `components/combat.py`). Each of them calls `OCCUPANCY.update(obj)`,
+which works out where (and if) the object belongs.
+
+```python
+from world.occupancy import OCCUPANCY
+
+targets = OCCUPANCY.targets(room)
+```
+"""
+from evennia.utils import utils
+
+
+class Occupancy(object):
+    """
+    Targetable characters, by room.
+
+    Attrs:
+        rooms:  Dictionaries of targetable characters by id, by room id
+        where:  The room id each indexed character is in, by character id
+    """
+
+    def __init__(self) -> None:
+        self.rooms = {}
+        self.where = {}
+
+    def targets(self, room) -> set:
+        """
+        Returns the targetable characters in a room.
+
+        Args:
+            room:   The room to look in
+        """
+        if not room:
+            return set()
+        return set(self.rooms.get(room.id, {}).values())
+
+    def locate(self, obj) -> int:
+        """Returns the id of the room a targetable character is in, or None."""
+        return self.where.get(obj.id)
+
+    def occupied(self, room) -> bool:
+        """Checks if a room has any targetable characters in it."""
+        return bool(room and self.rooms.get(room.id))
+
+    def update(self, obj):
+        """
+        Adds, moves or removes a character, according to its current state.
+
+        Args:
+            obj:    The character which moved, was (un)puppeted, died or revived
+        """
+        room = obj.location
+        roomid = room.id if room and eligible(obj) else None
+        current = self.where.get(obj.id)
+        if current == roomid:
+            return
+
+        # leave the old room
+        if current is not None:
+            occupants = self.rooms.get(current, {})
+            occupants.pop(obj.id, None)
+            if not occupants:
+                self.rooms.pop(current, None)
+            del self.where[obj.id]
+
+        # enter the new one
+        if roomid is not None:
+            self.rooms.setdefault(roomid, {})[obj.id] = obj
+            self.where[obj.id] = roomid
+
+    def remove(self, obj):
+        """Removes a character from the index, wherever it is."""
+        current = self.where.pop(obj.id, None)
+        if current is None:
+            return
+        occupants = self.rooms.get(current, {})
+        occupants.pop(obj.id, None)
+        if not occupants:
+            self.rooms.pop(current, None)
+
+    def rebuild(self):
+        """Rebuilds the index from all puppeted characters. Sessions are resynced from
+        the portal without puppet hooks after a reload, so this runs after startup."""
+        self.rooms = {}
+        self.where = {}
+        sessions = utils.variable_from_module(
+            "evennia.server.sessionhandler", "SESSION_HANDLER"
+        )
+        for session in sessions.get_sessions():
+            puppet = session.get_puppet()
+            if puppet:
+                self.update(puppet)
+
+
+def eligible(obj) -> bool:
+    """Checks if a character is a valid AI target: puppeted, not a superuser and not dead."""
+    return (
+        obj.has_account
+        and not obj.is_superuser
+        and not obj.tags.has("dead", category="combat")
+    )
+
+
+OCCUPANCY = Occupancy()
@@ -0,0 +1,166 @@
+"""
+Output
+
+Per-room output buffering. Instead of every line of an action walking the room's
+contents and sending its own packet to every session, lines are collected while a
+buffer is open and flushed as one message per recipient.
+
+Buffers are opened either for the span of an action:
+
+```python
+with batch(attacker.location):
+    ...  # every location.msg_contents call in here is collected
+```
+
+or for the rest of the current server tick, flushing once the reactor is free:
+
+```python
+defer(room).add("The ground shakes!")
+```
+
+`Room.msg_contents` routes plain-string messages to an open buffer automatically.
+Per-recipient lines (like "You take 5 damage!") can be kept in order with the room's
+lines through `tell`.
+"""
+from contextlib import contextmanager
+from twisted.internet import reactor
+
+SEPARATOR = "|n\n"
+
+_BUFFERS = {}
+"""Open buffers, by room id"""
+
+
+class RoomBuffer(object):
+    """
+    Collects the lines sent to a room while it is open.
+
+    Attrs:
+        room:   The room this buffer collects output for
+        lines:  A list of (text, excluded objects, only recipient) tuples
+        depth:  How many `batch` scopes currently hold this buffer open
+    """
+
+    def __init__(self, room) -> None:
+        self.room = room
+        self.lines = []
+        self.depth = 0
+        self.deferred = False
+
+    def add(self, text: str, exclude=None):
+        """
+        Adds a line for everyone in the room.
+
+        Args:
+            text:       The line to send
+            exclude:    (optional) An object or list of objects which should not receive the line
+        """
+        if exclude and not isinstance(exclude, (list, tuple, set)):
+            exclude = [exclude]
+        self.lines.append((text, set(exclude) if exclude else None, None))
+
+    def tell(self, obj, text: str):
+        """
+        Adds a line for a single recipient.
+
+        Args:
+            obj:    The object to send the line to
+            text:   The line to send
+        """
+        self.lines.append((text, None, obj))
+
+    def flush(self):
+        """Sends all collected lines, one message per recipient."""
+        lines, self.lines = self.lines, []
+        if not lines:
+            return
+
+        # recipients with identical output share one joined string
+        joined = {}
+        for receiver in self.room.contents:
+            own = tuple(
+                i
+                for i, (text, exclude, only) in enumerate(lines)
+                if (only is None or only == receiver)
+                if not (exclude and receiver in exclude)
+            )
+            if not own:
+                continue
+            if own not in joined:
+                joined[own] = SEPARATOR.join(lines[i][0].rstrip("\n") for i in own)
+            receiver.msg(text=(joined[own], {}))
+
+        # lines told to objects which have since left the room
+        for text, _, only in lines:
+            if only is not None and only.location != self.room:
+                only.msg(text)
+
+
+def buffer_for(room) -> RoomBuffer:
+    """Returns the open buffer for the room, or None if output is not being buffered."""
+    if not room:
+        return None
+    return _BUFFERS.get(room.id)
+
+
+@contextmanager
+def batch(room):
+    """
+    Buffers all output to the room for the duration of the `with` block. Nested batches
+    on the same room share one buffer, which flushes when the outermost block exits.
+
+    Args:
+        room:   The room to buffer output for
+    """
+    if not room:
+        yield None
+        return
+    buffer = _BUFFERS.get(room.id)
+    if not buffer:
+        buffer = _BUFFERS[room.id] = RoomBuffer(room)
+    buffer.depth += 1
+    try:
+        yield buffer
+    finally:
+        buffer.depth -= 1
+        if not buffer.depth and not buffer.deferred:
+            _close(buffer)
+
+
+def defer(room) -> RoomBuffer:
+    """
+    Opens (or returns) a buffer for the room which flushes at the end of the current
+    server tick.
+
+    Args:
+        room:   The room to buffer output for
+    """
+    buffer = _BUFFERS.get(room.id)
+    if not buffer:
+        buffer = _BUFFERS[room.id] = RoomBuffer(room)
+    if not buffer.deferred:
+        buffer.deferred = True
+        reactor.callLater(0, _close, buffer)
+    return buffer
+
+
+def tell(obj, text: str):
+    """
+    Sends a line to a single object, in order with any buffered output to its location.
+
+    Args:
+        obj:    The object to message
+        text:   The line to send
+    """
+    buffer = buffer_for(obj.location)
+    if buffer:
+        buffer.tell(obj, text)
+    else:
+        obj.msg(text)
+
+
+def _close(buffer: RoomBuffer):
+    """Flushes a buffer and stops buffering its room."""
+    if _BUFFERS.get(buffer.room.id) is buffer:
+        del _BUFFERS[buffer.room.id]
+    buffer.flush()
@@ -0,0 +1,173 @@
+"""
+Rolls
+
+Batched opposed hit rolls. Multi-shot weapons and AoE attacks make many opposed hit
+rolls in one action; instead of building a full AttackContext for every shot, all of
+an action's rolls are made at once and kept as flat arrays, and only the shots that
+actually need one (hits, usually) are turned into contexts afterwards.
+
+NumPy is used when it's installed. Without it, the same rolls are made with plain
+lists and the `random` module.
+
+```python
+rolls = opposed_rolls(acc=40, eva=25, crit=2.0, count=weapon.shots)
+for i in rolls.hits:
+    ...
+```
+"""
+import random
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+class OpposedRolls(object):
+    """
+    The results of a batch of opposed hit rolls, one entry per roll.
+
+    Attrs:
+        hit:        The attacker's d100 rolls
+        hitbonus:   The attacker's random(accuracy) bonuses
+        dodge:      The defender's d100 rolls
+        dodgebonus: The defender's random(evasion) bonuses
+        isHit:      Whether each roll hit
+        isCrit:     Whether each roll crit (regardless of hitting)
+    """
+
+    __slots__ = ("hit", "hitbonus", "dodge", "dodgebonus", "isHit", "isCrit")
+
+    def __init__(self, hit, hitbonus, dodge, dodgebonus, isHit, isCrit) -> None:
+        self.hit = hit
+        self.hitbonus = hitbonus
+        self.dodge = dodge
+        self.dodgebonus = dodgebonus
+        self.isHit = isHit
+        self.isCrit = isCrit
+
+    def __len__(self):
+        return len(self.isHit)
+
+    @property
+    def hits(self) -> list[int]:
+        """The indices of all rolls which hit"""
+        if np is not None and isinstance(self.isHit, np.ndarray):
+            return np.flatnonzero(self.isHit).tolist()
+        return [i for i, h in enumerate(self.isHit) if h]
+
+    @property
+    def hitcount(self) -> int:
+        """The number of rolls which hit"""
+        return int(sum(self.isHit))
+
+    def first_miss(self) -> int:
+        """The index of the first miss, or the number of rolls if all hit"""
+        for i, h in enumerate(self.isHit):
+            if not h:
+                return i
+        return len(self)
+
+    def roll(self, index: int) -> tuple:
+        """
+        Returns a single roll as plain python values.
+
+        Args:
+            index:  The roll to return
+
+        Returns a tuple of (hit, hitbonus, dodge, dodgebonus, isHit, isCrit)
+        """
+        return (
+            int(self.hit[index]),
+            float(self.hitbonus[index]),
+            int(self.dodge[index]),
+            float(self.dodgebonus[index]),
+            bool(self.isHit[index]),
+            bool(self.isCrit[index]),
+        )
+
+
+def opposed_rolls(acc=0.0, eva=0.0, crit=2.0, count: int = 1) -> OpposedRolls:
+    """
+    Makes a batch of opposed hit rolls. Each roll is d100 + random(acc) against
+    d100 + random(eva), and crits when the hit d100 is greater than the dodge d100
+    times the crit multiplier; see `CombatHandler.opposed_hit`.
+
+    Args:
+        acc:    (default: 0) The attacker's accuracy modifier
+        eva:    (default: 0) The defender's evasion modifier, or a list of them (one per target)
+        crit:   (default: 2) The attacker's crit multiplier
+        count:  (default: 1) The number of rolls. Ignored if eva is a list
+
+    Returns an OpposedRolls object
+    """
+    if isinstance(eva, (list, tuple)):
+        count = len(eva)
+    if np is not None:
+        return _numpy_rolls(acc, eva, crit, count)
+
+    evas = eva if isinstance(eva, (list, tuple)) else [eva] * count
+    hit = [int(random.random() * 100) for _ in range(count)]
+    dodge = [int(random.random() * 100) for _ in range(count)]
+    hitbonus = [acc * random.random() for _ in range(count)]
+    dodgebonus = [e * random.random() for e in evas]
+    isHit = [
+        h + hb > d + db for h, hb, d, db in zip(hit, hitbonus, dodge, dodgebonus)
+    ]
+    isCrit = [h > d * crit for h, d in zip(hit, dodge)]
+    return OpposedRolls(hit, hitbonus, dodge, dodgebonus, isHit, isCrit)
+
+
+def roll_arrays(acc, eva, crit, shape, rng=None) -> OpposedRolls:
+    """
+    Makes opposed hit rolls as numpy arrays of any shape. Used by the combat simulator
+    to roll many engagements at once. Requires numpy.
+
+    Args:
+        acc:    The attacker's accuracy modifier, or an array broadcastable to shape
+        eva:    The defender's evasion modifier, or an array broadcastable to shape
+        crit:   The attacker's crit multiplier
+        shape:  The shape of the result arrays
+        rng:    (optional) The numpy generator to use. Defaults to the shared one
+
+    Returns an OpposedRolls object
+    """
+    if isinstance(shape, int):
+        shape = (shape,)
+    r = (rng or _rng()).random((4,) + tuple(shape))
+    hit = (r[0] * 100).astype(int)
+    dodge = (r[1] * 100).astype(int)
+    hitbonus = np.asarray(acc, dtype=float) * r[2]
+    dodgebonus = np.asarray(eva, dtype=float) * r[3]
+    isHit = hit + hitbonus > dodge + dodgebonus
+    isCrit = hit > dodge * crit
+    return OpposedRolls(hit, hitbonus, dodge, dodgebonus, isHit, isCrit)
+
+
+def _numpy_rolls(acc, eva, crit, count) -> OpposedRolls:
+    """Makes a batch of opposed hit rolls as numpy arrays"""
+    return roll_arrays(acc, eva, crit, count)
+
+
+_RNG = None
+
+
+def _rng():
+    """The shared numpy generator, created on first use"""
+    global _RNG
+    if _RNG is None:
+        _RNG = np.random.default_rng()
+    return _RNG
+
+
+def seed(value=None):
+    """
+    Seeds the roller, for reproducible rolls.
+
+    Args:
+        value:  The seed. Reseeds from system entropy if None
+    """
+    global _RNG
+    random.seed(value)
+    if np is not None:
+        _RNG = np.random.default_rng(value)
@@ -0,0 +1,210 @@
+"""
+Scheduler
+
+The AI scheduler. Every NPC's next wake-up is an entry in one heap of
+(wake time, npc) entries, instead of a reactor call per NPC. A single loop pops the
+NPCs that are due each tick and calls `ai.act` on them, and stops as soon as the
+tick's time budget is spent. Whatever is left over is still due, and goes first on
+the next tick, so a burst of AI work is spread out instead of stalling command
+processing.
+
+NPCs with no players nearby can be put to `sleep`, which takes them out of the
+queue entirely until a player moves, logs in or revives within `WAKE_RANGE` exits of
+them (see `wake_near`), so AI cost follows the players around instead of growing with
+the number of NPCs. Players are looked up in the occupancy index (see
+`world.occupancy`), never by scanning room contents.
+
+Wake-ups are not persistent; NPCs schedule themselves again from `at_init` after a
+reload. The service is started and stopped from `server/conf/at_server_startstop.py`.
+
+```python
+from world.scheduler import AI_SCHEDULER
+
+AI_SCHEDULER.schedule(npc, 5)
+AI_SCHEDULER.cancel(npc)
+```
+"""
+import heapq
+import time
+from twisted.internet import task
+from evennia.utils import logger
+from components.owner import OwnerRef
+from world.graph import ROOM_GRAPH
+from world.occupancy import OCCUPANCY
+
+RESOLUTION = 0.1
+"""How often the scheduler ticks, in seconds"""
+BUDGET = 0.02
+"""How long, in seconds, each tick may spend waking NPCs"""
+WAKE_RANGE = 3
+"""How many exits away a player's movement wakes dormant NPCs. Should cover the
+largest brain `wake_range`"""
+
+
+class AIScheduler(object):
+    """
+    A priority queue of NPC wake-ups, drained in time-budgeted batches.
+
+    Attrs:
+        heap:       The (wake time, sequence, object id) entries
+        wakes:      The current wake time of each scheduled object, by id
+        refs:       References to each scheduled object, by id
+        budget:     The time budget of each tick, in seconds
+        overruns:   How many ticks have run out of budget with NPCs still due
+        dormant:    The ids of sleeping objects, by the id of the room they sleep in
+    """
+
+    def __init__(self, resolution=RESOLUTION, budget=BUDGET) -> None:
+        self.resolution = resolution
+        self.budget = budget
+        self.heap = []
+        self.wakes = {}
+        self.refs = {}
+        self.overruns = 0
+        self.dormant = {}
+        self._sleeping = {}
+        self._counter = 0
+        self._loop = None
+
+    def __len__(self):
+        return len(self.wakes)
+
+    # region methods
+    def schedule(self, obj, delay):
+        """
+        Schedules an object's next `ai.act`. Replaces any existing wake-up for it.
+
+        Args:
+            obj:    The object to wake, usually an NPC
+            delay:  The delay in seconds
+        """
+        self._unsleep(obj.id)
+        due = time.monotonic() + max(0, delay)
+        self._counter += 1
+        self.wakes[obj.id] = due
+        if obj.id not in self.refs:
+            self.refs[obj.id] = OwnerRef(obj)
+        heapq.heappush(self.heap, (due, self._counter, obj.id))
+
+    def cancel(self, obj):
+        """Cancels an object's wake-up, if it has one."""
+        self._unsleep(obj.id)
+        self.wakes.pop(obj.id, None)
+        self.refs.pop(obj.id, None)
+
+    def sleep(self, obj):
+        """
+        Makes an object dormant. It is not woken again until a player moves near its
+        location, or something schedules it directly.
+
+        Args:
+            obj:    The object to put to sleep
+        """
+        self.cancel(obj)
+        room = obj.location
+        if not room:
+            return
+        self.dormant.setdefault(room.id, set()).add(obj.id)
+        self._sleeping[obj.id] = (room.id, OwnerRef(obj))
+
+    def is_dormant(self, obj) -> bool:
+        """Checks if an object is asleep."""
+        return obj.id in self._sleeping
+
+    def wake_near(self, room, distance: int = WAKE_RANGE):
+        """
+        Wakes all objects sleeping within a number of exits of a room. Called whenever a
+        player arrives somewhere.
+
+        Args:
+            room:       The room the player arrived in
+            distance:   (default: WAKE_RANGE) How many exits away to wake objects
+        """
+        if not room or not self._sleeping:
+            return
+        for place in ROOM_GRAPH.rooms_within(room, distance):
+            for dbid in list(self.dormant.get(place.id, ())):
+                obj = self._sleeping[dbid][1]()
+                if obj:
+                    self.schedule(obj, 0)
+                else:
+                    self._unsleep(dbid)
+
+    def has(self, obj) -> bool:
+        """Checks if an object has a wake-up scheduled."""
+        return obj.id in self.wakes
+
+    def remaining(self, obj) -> float:
+        """Returns the time until an object's wake-up, or 0 if it has none."""
+        due = self.wakes.get(obj.id)
+        if due is None:
+            return 0
+        return max(0, due - time.monotonic())
+
+    def run(self):
+        """Wakes due objects, until none are due or the tick's budget is spent."""
+        heap = self.heap
+        now = time.monotonic()
+        deadline = time.perf_counter() + self.budget
+        while heap and heap[0][0] <= now:
+            if time.perf_counter() > deadline:
+                # the rest are still due, and go first next tick
+                self.overruns += 1
+                return
+            due, _, dbid = heapq.heappop(heap)
+
+            # skip cancelled or rescheduled entries
+            if self.wakes.get(dbid) != due:
+                continue
+            del self.wakes[dbid]
+            obj = self.refs.pop(dbid)()
+            if not obj:
+                continue
+            try:
+                obj.ai.act()
+            except Exception:
+                logger.log_trace("AI wake-up failed for #%i." % dbid)
+
+    def start(self):
+        """Starts ticking."""
+        if self._loop and self._loop.running:
+            return
+        self._loop = task.LoopingCall(self.run)
+        self._loop.start(self.resolution, now=False)
+
+    def stop(self):
+        """Stops ticking."""
+        if self._loop and self._loop.running:
+            self._loop.stop()
+
+    # endregion
+
+    # region private methods
+    def _unsleep(self, dbid):
+        """Removes an object from the dormant index"""
+        sleeping = self._sleeping.pop(dbid, None)
+        if not sleeping:
+            return
+        ids = self.dormant.get(sleeping[0])
+        if ids:
+            ids.discard(dbid)
+            if not ids:
+                del self.dormant[sleeping[0]]
+
+    # endregion
+
+
+def players_near(room, distance: int) -> bool:
+    """
+    Checks if any targetable player (see `world.occupancy`) is within a number of exits
+    of a room.
+
+    Args:
+        room:       The room to start from
+        distance:   How many exits to follow
+    """
+    occupied = OCCUPANCY.rooms
+    return any(roomid in occupied for roomid in ROOM_GRAPH.distances(room, None, distance))
+
+
+AI_SCHEDULER = AIScheduler()
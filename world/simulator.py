@@ -0,0 +1,480 @@
+"""
+Simulator
+
+A headless Monte Carlo combat simulator, for balancing weapons and perks without
+booting the server. It runs the same math as `CombatHandler.weapon_attack` (opposed
+hit rolls, crits, precision multipliers and total damage bonuses) over many
+engagements at once, with every engagement a column of numpy arrays.
+
+Weapons can be `WeaponStats`, or plain dictionaries with the same keys (like
+`world.prototypes.HIVE_BOOMER`). NPC prototypes with a "weapon" key use that weapon.
+Perks are given by key or class, and are simulated by the models in `PERK_MODELS`,
+since the real perks need live game objects to trigger on.
+
+Single runs:
+
+```python
+from world.simulator import simulate
+result = simulate(HIVE_BOOMER, evasion=10, perks=["rampage"], hp=200)
+result.summary()
+```
+
+Grids of weapon x perk set x evasion, spread over a process pool:
+
+```python
+simulate_grid([HIVE_BOOMER, GNAWING_STATS], [[], ["rampage"], ["exploit"]], [0, 10, 25])
+```
+
+Or from the game directory, without Django at all:
+
+```
+python -m world.simulator --damage 10 --shots 3 --evasion 0 10 25 --perks rampage exploit
+```
+
+Requires numpy.
+"""
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+from itertools import product
+from world.rolls import roll_arrays
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+ENGAGEMENTS = 100000
+"""Default number of engagements per simulation"""
+TARGET_HP = 100
+"""Default target health"""
+MAX_ATTACKS = 200
+"""Engagements which haven't killed the target after this many attacks are given up on"""
+PERCENTILES = (5, 25, 50, 75, 95)
+
+WEAPON_FIELDS = ("weapon", "accuracy", "damage", "crit", "mult", "shots", "cooldown")
+WEAPON_DEFAULTS = {
+    "weapon": "Template",
+    "accuracy": 1.0,
+    "damage": 10,
+    "crit": 2.0,
+    "mult": 2.0,
+    "shots": 1,
+    "cooldown": 6,
+}
+
+
+class Engagement(object):
+    """
+    The state of many simultaneous engagements against one target each. Every attribute
+    is an array with one entry per engagement.
+
+    Perk models read and update this state; see `PERK_MODELS`.
+    """
+
+    def __init__(self, count: int, hp) -> None:
+        self.count = count
+        self.hp = np.full(count, float(hp))
+        self.alive = np.ones(count, dtype=bool)
+        self.damage_mult = np.ones(count)
+        self.total_bonus = np.zeros(count)
+        self.dealt = np.zeros(count)
+        self.stacks = {}
+        self.timers = {}
+
+    def stack(self, key: str):
+        """Returns the stack array for a key, creating it if needed."""
+        if key not in self.stacks:
+            self.stacks[key] = np.zeros(self.count)
+        return self.stacks[key]
+
+    def timer(self, key: str, default=float("-inf")):
+        """Returns the timestamp array for a key, creating it if needed."""
+        if key not in self.timers:
+            self.timers[key] = np.full(self.count, default)
+        return self.timers[key]
+
+
+class SimResult(object):
+    """
+    The raw per-engagement results of a simulation.
+
+    Attrs:
+        weapon:     The simulated weapon, as a dictionary
+        evasion:    The target's evasion
+        perks:      The keys of the simulated perks
+        hp:         The target's health
+        ttk:        Time-to-kill in seconds, per engagement (nan if the target survived)
+        attacks:    Attacks made, per engagement
+        dealt:      Damage dealt (before overkill), per engagement
+        overkill:   Damage in excess of the target's remaining health, per engagement
+        shots:      Total shots fired
+        hits:       Total shots which hit
+        crits:      Total shots which hit and crit
+        ignored:    Perks with no model, which were left out of the simulation
+    """
+
+    def __init__(self, weapon, evasion, perks, hp, ignored=()) -> None:
+        self.weapon = weapon
+        self.evasion = evasion
+        self.perks = tuple(perks)
+        self.hp = hp
+        self.ignored = tuple(ignored)
+        self.ttk = None
+        self.attacks = None
+        self.dealt = None
+        self.overkill = None
+        self.shots = 0
+        self.hits = 0
+        self.crits = 0
+
+    @property
+    def dps(self):
+        """Damage per second of each engagement, from the first attack to the kill"""
+        duration = self.attacks * self.weapon["cooldown"]
+        return self.dealt / np.maximum(duration, 1e-9)
+
+    @property
+    def kill_rate(self) -> float:
+        """The fraction of engagements which killed the target"""
+        return float(np.mean(~np.isnan(self.ttk)))
+
+    @property
+    def hit_rate(self) -> float:
+        return self.hits / self.shots if self.shots else 0.0
+
+    @property
+    def crit_rate(self) -> float:
+        """The fraction of hits which crit"""
+        return self.crits / self.hits if self.hits else 0.0
+
+    def summary(self) -> dict:
+        """Returns the means and percentiles of the results, as a dictionary."""
+        killed = ~np.isnan(self.ttk)
+        return {
+            "weapon": self.weapon["weapon"],
+            "evasion": self.evasion,
+            "perks": self.perks,
+            "ignored": self.ignored,
+            "hit_rate": self.hit_rate,
+            "crit_rate": self.crit_rate,
+            "kill_rate": self.kill_rate,
+            "dps": _distribution(self.dps),
+            "ttk": _distribution(self.ttk[killed]),
+            "overkill": _distribution(self.overkill[killed]),
+        }
+
+
+# region perk models
+def _rampage(state: Engagement, hits, now: float):
+    """RampagePerk: every hit adds a stack of Rampage (max 3), lasting 30 seconds. Its
+    Mod("damage", "mult", 0.15, 0.15) gives +15% damage, plus 15% per stack."""
+    stacks = state.stack("rampage")
+    last = state.timer("rampage")
+    stacks[now - last > 30] = 0
+    stacks += hits
+    np.minimum(stacks, 3, out=stacks)
+    last[hits > 0] = now
+    state.damage_mult *= np.where(stacks > 0, 1 + 0.15 + 0.15 * stacks, 1)
+
+
+def _exploit(state: Engagement, hits, now: float):
+    """ExploitPerk: hits add Exploit stacks (max 20). Each hit has a stacks/20 chance to
+    turn them into Exploited, which adds 100 total damage to the next attack that hits."""
+    stacks = state.stack("exploit")
+    exploited = state.stack("exploited")
+    stacks[now - state.timer("exploit") > 30] = 0
+    for _ in range(int(hits.max(initial=0))):
+        hitting = (hits > 0) & (exploited == 0)
+        proc = hitting & (_rng().random(state.count) < stacks / 20)
+        exploited[proc] = 1
+        stacks[proc] = 0
+        stacks[hitting & ~proc] += 1
+        np.minimum(stacks, 20, out=stacks)
+        hits = hits - 1
+    state.timer("exploit")[stacks > 0] = now
+    state.total_bonus += 100 * exploited
+
+
+def _exploit_consume(state: Engagement, hit):
+    """Exploited is removed after the check it applied to"""
+    if "exploited" in state.stacks:
+        state.stacks["exploited"][hit] = 0
+
+
+def _weaken(state: Engagement, hits, now: float):
+    """WeakenPerk: every hit applies a stack of Poison to the target (max 5). Poison
+    deals 5 damage per stack every 5 seconds for 30 seconds, going up by 1 with every
+    tick. Applying it again refreshes it, which restarts its ticks at 5 damage."""
+    applied = state.timer("poison")
+    expires = state.timer("poison_expire")
+    ticks = state.stack("poison_ticks")
+    stacks = state.stack("poison_stacks")
+    hit = hits > 0
+    # accrued ticks were dealt by _tick_poison before this attack
+    stacks[hit & (expires < now)] = 0
+    stacks += hits
+    np.minimum(stacks, 5, out=stacks)
+    applied[hit] = now
+    ticks[hit] = 0
+    expires[hit] = now + 30
+
+
+def _tick_poison(state: Engagement, end: float):
+    """Deals the poison damage which ticked since the last attack"""
+    if "poison" not in state.timers:
+        return np.zeros(state.count)
+    applied = state.timers["poison"]
+    expires = state.timers["poison_expire"]
+    ticks = state.stacks["poison_ticks"]
+    stacks = state.stacks["poison_stacks"]
+    last = np.minimum(end, expires)
+    # engagements which were never poisoned have no start time
+    with np.errstate(invalid="ignore"):
+        due = np.floor((last - applied) / 5)
+    due = np.where(np.isfinite(due), np.maximum(due, 0), 0)
+    new = np.maximum(due - ticks, 0)
+    # arithmetic series per stack: 5 + ticks, 5 + ticks + 1, ...
+    damage = stacks * (new * (5 + ticks) + new * (new - 1) / 2)
+    ticks += new
+    return damage
+
+
+PERK_MODELS = {
+    "rampage": _rampage,
+    "exploit": _exploit,
+    "weaken": _weaken,
+    # heals the attacker, which doesn't change damage output
+    "leechround": None,
+}
+"""Perk key -> model. Models are called after each attack with the engagement state,
+the number of hits per engagement, and the time of the attack."""
+# endregion
+
+
+def simulate(
+    weapon,
+    evasion=0,
+    perks=(),
+    hp=TARGET_HP,
+    engagements: int = ENGAGEMENTS,
+    max_attacks: int = MAX_ATTACKS,
+    seed=None,
+) -> SimResult:
+    """
+    Simulates many engagements of a weapon against a target, attacking every cooldown
+    until the target dies.
+
+    Args:
+        weapon:         The weapon; WeaponStats, a weapon dictionary or an NPC prototype
+        evasion:        (default: 0) The target's evasion
+        perks:          (optional) The perks on the weapon, by key or class
+        hp:             (default: TARGET_HP) The target's health
+        engagements:    (default: ENGAGEMENTS) The number of engagements to simulate
+        max_attacks:    (default: MAX_ATTACKS) The number of attacks before an engagement is given up on
+        seed:           (optional) A seed, for reproducible results
+
+    Returns a SimResult
+    """
+    if np is None:
+        raise ImportError("The combat simulator requires numpy.")
+    rng = np.random.default_rng(seed)
+    stats = weapon_dict(weapon)
+    keys = [getattr(perk, "key", perk) for perk in perks]
+    models = [PERK_MODELS[k] for k in keys if PERK_MODELS.get(k)]
+    ignored = [k for k in keys if k not in PERK_MODELS]
+
+    result = SimResult(stats, evasion, keys, hp, ignored)
+    state = Engagement(engagements, hp)
+    shots = max(1, int(stats["shots"]))
+    cooldown = stats["cooldown"]
+    attacks = np.zeros(engagements)
+    ttk = np.full(engagements, np.nan)
+    overkill = np.zeros(engagements)
+
+    global _ACTIVE
+    _ACTIVE = rng
+    for n in range(max_attacks):
+        live = state.alive
+        if not live.any():
+            break
+        now = n * cooldown
+
+        # poison and other damage over time since the last attack
+        dot = _tick_poison(state, now) * live
+        _apply(state, dot, now, ttk, overkill)
+        live = state.alive
+
+        # roll every shot of every engagement at once
+        rolls = roll_arrays(
+            stats["accuracy"], evasion, stats["crit"], (engagements, shots), rng
+        )
+        hit = rolls.isHit & live[:, None]
+        crit = hit & rolls.isCrit
+        hits = hit.sum(axis=1)
+        result.shots += int(live.sum()) * shots
+        result.hits += int(hits.sum())
+        result.crits += int(crit.sum())
+
+        # damage per shot, with precision on crits; total damage bonuses if anything hit
+        per_shot = stats["damage"] * state.damage_mult
+        damage = (hit.sum(axis=1) + crit.sum(axis=1) * (stats["mult"] - 1)) * per_shot
+        was_hit = hits > 0
+        damage = damage + state.total_bonus * was_hit
+        _exploit_consume(state, was_hit)
+
+        attacks += live
+        _apply(state, damage, now, ttk, overkill)
+
+        # perk triggers, which affect the next attack
+        state.damage_mult[:] = 1
+        state.total_bonus[:] = 0
+        for model in models:
+            model(state, hits, now)
+
+    result.ttk = ttk
+    result.attacks = attacks
+    result.dealt = state.dealt
+    result.overkill = overkill
+    return result
+
+
+def simulate_grid(
+    weapons: list,
+    perksets: list,
+    evasions: list,
+    hp=TARGET_HP,
+    engagements: int = ENGAGEMENTS,
+    processes: int = None,
+    seed=None,
+) -> list[dict]:
+    """
+    Simulates every combination of weapon, perk set and evasion, in a process pool.
+
+    Args:
+        weapons:        A list of weapons; see `simulate`
+        perksets:       A list of perk lists
+        evasions:       A list of target evasions
+        hp:             (default: TARGET_HP) The target's health
+        engagements:    (default: ENGAGEMENTS) The number of engagements per combination
+        processes:      (optional) The number of worker processes. Defaults to one per CPU
+        seed:           (optional) A seed, for reproducible results
+
+    Returns a list of result summaries, in grid order
+    """
+    if np is None:
+        raise ImportError("The combat simulator requires numpy.")
+    # only plain data crosses the process boundary
+    weapons = [weapon_dict(w) for w in weapons]
+    perksets = [tuple(getattr(p, "key", p) for p in ps) for ps in perksets]
+    cells = list(product(weapons, perksets, evasions))
+    seeds = np.random.SeedSequence(seed).spawn(len(cells))
+    jobs = [(w, e, ps, hp, engagements, s) for (w, ps, e), s in zip(cells, seeds)]
+
+    with ProcessPoolExecutor(max_workers=processes) as pool:
+        return list(pool.map(_run_cell, jobs))
+
+
+def weapon_dict(weapon) -> dict:
+    """
+    Returns the simulated stats of a weapon as a dictionary.
+
+    Args:
+        weapon: WeaponStats, a weapon dictionary, or an NPC prototype with a "weapon" key
+    """
+    if isinstance(weapon, dict):
+        if isinstance(weapon.get("weapon"), dict):
+            weapon = weapon["weapon"]
+        found = {k: weapon[k] for k in WEAPON_FIELDS if k in weapon}
+    else:
+        found = {k: getattr(weapon, k) for k in WEAPON_FIELDS if hasattr(weapon, k)}
+    return dict(WEAPON_DEFAULTS, **found)
+
+
+def _run_cell(job) -> dict:
+    """Runs a single grid cell in a worker process"""
+    weapon, evasion, perks, hp, engagements, seed = job
+    return simulate(weapon, evasion, perks, hp, engagements, seed=seed).summary()
+
+
+def _apply(state: Engagement, damage, now: float, ttk, overkill):
+    """Applies damage to live engagements, and records any kills"""
+    damage = damage * state.alive
+    dealt = np.minimum(damage, np.maximum(state.hp, 0))
+    state.dealt += dealt
+    state.hp -= damage
+    killed = state.alive & (state.hp <= 0)
+    ttk[killed] = now
+    overkill[killed] = -state.hp[killed]
+    state.alive &= ~killed
+
+
+_ACTIVE = None
+
+
+def _rng():
+    """The generator of the running simulation, for perk models which roll"""
+    return _ACTIVE
+
+
+def _distribution(values) -> dict:
+    """The mean and percentiles of an array"""
+    if not len(values):
+        return {"mean": float("nan")}
+    found = {"mean": float(np.mean(values))}
+    for pct, value in zip(PERCENTILES, np.percentile(values, PERCENTILES)):
+        found["p%i" % pct] = float(value)
+    return found
+
+
+def _format(summary: dict) -> str:
+    """A one-line report of a result summary"""
+    dps, ttk, over = summary["dps"], summary["ttk"], summary["overkill"]
+    line = "{0:<16} eva {1:>4} {2:<24} hit {3:6.1%} crit {4:6.1%} dps {5:7.2f} ttk {6:6.1f}s (p95 {7:6.1f}s) overkill {8:6.1f}"
+    return line.format(
+        summary["weapon"],
+        summary["evasion"],
+        "+".join(summary["perks"]) or "-",
+        summary["hit_rate"],
+        summary["crit_rate"],
+        dps["mean"],
+        ttk["mean"],
+        ttk.get("p95", float("nan")),
+        over["mean"],
+    )
+
+
+def main(args=None):
+    """Runs a grid from the command line and prints one line per cell."""
+    parser = argparse.ArgumentParser(description="Simulate weapon engagements.")
+    parser.add_argument("--weapon", default=WEAPON_DEFAULTS["weapon"])
+    for key in ("accuracy", "damage", "crit", "mult", "shots", "cooldown"):
+        parser.add_argument("--" + key, type=float, default=WEAPON_DEFAULTS[key])
+    parser.add_argument("--evasion", type=float, nargs="+", default=[0])
+    parser.add_argument(
+        "--perks", nargs="*", default=[], help="perk keys; each is also run alone"
+    )
+    parser.add_argument("--hp", type=float, default=TARGET_HP)
+    parser.add_argument("--engagements", type=int, default=ENGAGEMENTS)
+    parser.add_argument("--processes", type=int, default=None)
+    parser.add_argument("--seed", type=int, default=None)
+    opts = parser.parse_args(args)
+
+    weapon = {k: getattr(opts, k) for k in WEAPON_FIELDS}
+    perksets = [[]] + [[p] for p in opts.perks]
+    if len(opts.perks) > 1:
+        perksets.append(list(opts.perks))
+    summaries = simulate_grid(
+        [weapon],
+        perksets,
+        opts.evasion,
+        opts.hp,
+        opts.engagements,
+        opts.processes,
+        opts.seed,
+    )
+    for summary in summaries:
+        print(_format(summary))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+"""
+Snapshots
+
+Immutable, compact snapshots of the world state around an NPC, and the evaluators that
+decide what the NPC does next from nothing but a snapshot. Snapshots hold only ids and
+literals, so they can be sent to a worker process; see `world.aipool`.
+
+This module must not import Evennia or any game module, so worker processes can load
+it without setting up Django.
+
+A brain opts in by naming an evaluator and the snapshot fields it needs:
+
+```python
+class PatrolBrain(BaseBrain):
+    evaluator = "world.snapshots.patrol"
+    snapshot_fields = ("occupancy", "exits")
+```
+
+An evaluator takes a Snapshot and returns a decision dictionary, which is handed back
+to the brain's `at_evaluate` hook on the main thread.
+"""
+import random
+from collections import deque
+from dataclasses import dataclass
+
+FIELDS = ("occupancy", "exits", "hp", "cooldowns")
+"""The optional snapshot fields a brain can ask for"""
+
+
+@dataclass(frozen=True)
+class Snapshot:
+    """
+    The world as an NPC sees it, at one moment.
+
+    Attrs:
+        npc:        The NPC's id
+        room:       The id of the NPC's room
+        target:     The id of the NPC's current target, if any
+        dead:       Whether the NPC is dead
+        range:      How many exits out the occupancy and exits fields cover
+        occupancy:  ((room id, (target ids, ...)), ...) for occupied rooms in range
+        exits:      ((room id, ((exit id, destination id), ...)), ...) for rooms in range,
+                    only including exits the NPC can traverse
+        hp:         (hp, maxhp) of the NPC
+        cooldowns:  ((key, time left), ...) of the NPC's active cooldowns
+    """
+
+    npc: int
+    room: int
+    target: int = None
+    dead: bool = False
+    range: int = 0
+    occupancy: tuple = ()
+    exits: tuple = ()
+    hp: tuple = None
+    cooldowns: tuple = ()
+
+    def targets(self, room: int) -> tuple:
+        """The ids of the targets in a room"""
+        for roomid, targets in self.occupancy:
+            if roomid == room:
+                return targets
+        return ()
+
+    def exits_from(self, room: int) -> tuple:
+        """The (exit id, destination id) pairs of the passable exits out of a room"""
+        for roomid, exits in self.exits:
+            if roomid == room:
+                return exits
+        return ()
+
+    def cooldown(self, key: str) -> float:
+        """The time left on a cooldown, or 0 if it isn't active"""
+        return dict(self.cooldowns).get(key, 0)
+
+
+def nearest_target(snapshot: Snapshot, prefer: int = None) -> tuple:
+    """
+    Finds the closest target outside the NPC's room, within the snapshot's range.
+
+    Args:
+        snapshot:   The snapshot
+        prefer:     (optional) A target id to go after if it can be reached at all
+
+    Returns a tuple of (target id, first destination id), or None
+    """
+    occupied = dict(snapshot.occupancy)
+    occupied.pop(snapshot.room, None)
+    if not occupied:
+        return None
+    edges = dict(snapshot.exits)
+
+    found = None
+    first = {snapshot.room: None}
+    frontier = deque([snapshot.room])
+    while frontier:
+        room = frontier.popleft()
+        for _, dest in edges.get(room, ()):
+            if dest in first:
+                continue
+            first[dest] = first[room] or dest
+            frontier.append(dest)
+            targets = occupied.get(dest)
+            if not targets:
+                continue
+            if prefer in targets:
+                return prefer, first[dest]
+            if found is None:
+                found = (targets[0], first[dest])
+    return found
+
+
+def patrol(snapshot: Snapshot) -> dict:
+    """
+    The evaluator for PatrolBrain: attack a target in the room, stalk the closest one
+    nearby, or wander.
+
+    Returns a decision dictionary with the keys:
+        behavior:       "attack", "move" or None
+        target:         The target id, if any
+        destination:    The destination room id, if moving
+        message:        The messaging key: "target", "stalk", "patrol" or "dead"
+    """
+    if snapshot.dead:
+        return {"behavior": None, "message": "dead"}
+
+    # targets right here
+    here = snapshot.targets(snapshot.room)
+    if here:
+        target = snapshot.target if snapshot.target in here else here[0]
+        return {"behavior": "attack", "target": target, "message": "target"}
+
+    # targets nearby
+    found = nearest_target(snapshot, snapshot.target)
+    if found:
+        target, destination = found
+        return {
+            "behavior": "move",
+            "target": target,
+            "destination": destination,
+            "message": "stalk",
+        }
+
+    # nobody around; wander
+    exits = snapshot.exits_from(snapshot.room)
+    destination = random.choice(exits)[1] if exits else None
+    return {"behavior": "move", "destination": destination, "message": "patrol"}
@@ -0,0 +1,187 @@
+"""
+Spawns
+
+A cache in front of the spawner for prototypes defined in modules (see
+`world/prototypes.py`). Spawning by key normally searches for the prototype, resolves
+its parents, validates it and works out its creation arguments every time. Here that
+is done once, when the cache loads at startup, and each spawn goes straight to
+creating the objects.
+
+Only prototypes whose values are fixed get their creation arguments cached.
+Prototypes with callables or protfuncs (such as `HIVE_KNIGHT`'s brain) are kept
+flattened and validated, and still run their functions for every object. Database
+prototypes, and module prototypes that fail validation, are spawned by the spawner
+as usual.
+
+The cache is rebuilt from `server/conf/at_server_startstop.py`. Call `reload` after
+changing module prototypes in a running server.
+
+```python
+from world.spawns import SPAWNS
+
+engram, = SPAWNS.spawn("WORLD_DROP")
+engrams = SPAWNS.spawn_many("WORLD_DROP", 10, room)
+```
+"""
+import evennia.prototypes.prototypes as protlib
+import evennia.prototypes.spawner as spawner
+
+
+class SpawnCache(object):
+    """
+    Flattened module prototypes, and the creation arguments of the fixed ones.
+
+    Attrs:
+        prototypes: Flattened, validated prototypes, by lowercase prototype key
+        params:     Creation arguments of fixed prototypes, by lowercase prototype key
+        sources:    The prototypes the cache was built from, by lowercase prototype key
+        errors:     Validation errors of prototypes left to the spawner, by key
+        loaded:     Whether the cache has been loaded
+    """
+
+    def __init__(self) -> None:
+        self.prototypes = {}
+        self.params = {}
+        self.sources = {}
+        self.errors = {}
+        self.loaded = False
+
+    # region methods
+    def load(self):
+        """Flattens and validates all module prototypes."""
+        self.invalidate()
+        for prototype in protlib.search_prototype(no_db=True):
+            key = prototype["prototype_key"].lower()
+            self.sources[key] = prototype
+            try:
+                flat = spawner.flatten_prototype(prototype, validate=True)
+            except (RuntimeError, RuntimeWarning) as err:
+                self.errors[key] = str(err)
+                continue
+            self.prototypes[key] = flat
+            if "key" in flat and is_fixed(flat):
+                self.params[key] = spawner.spawn(flat, only_validate=True)[0]
+        self.loaded = True
+
+    def invalidate(self):
+        """Empties the cache. It loads again on the next spawn."""
+        self.prototypes = {}
+        self.params = {}
+        self.sources = {}
+        self.errors = {}
+        self.loaded = False
+
+    def reload(self):
+        """Reloads prototype modules into the spawner, then rebuilds the cache."""
+        protlib.load_module_prototypes()
+        self.load()
+
+    def spawn(self, *prototypes, location=None) -> list:
+        """
+        Spawns one object for each prototype.
+
+        Args:
+            prototypes: Prototype keys, or prototype dictionaries
+            location:   (optional) Where to quietly move the new objects
+
+        Returns a list of the new objects
+        """
+        if not self.loaded:
+            self.load()
+        objs = []
+        for prototype in prototypes:
+            params = self._params(prototype)
+            if params:
+                objs.extend(spawner.batch_create_object(_copy(params)))
+            else:
+                objs.extend(spawner.spawn(self._resolve(prototype)))
+        return _place(objs, location)
+
+    def spawn_many(self, prototype, count: int, location=None) -> list:
+        """
+        Spawns several objects from one prototype.
+
+        Args:
+            prototype:  A prototype key, or a prototype dictionary
+            count:      How many objects to spawn
+            location:   (optional) Where to quietly move the new objects
+
+        Returns a list of the new objects
+        """
+        if count <= 0:
+            return []
+        if not self.loaded:
+            self.load()
+        params = self._params(prototype)
+        if params:
+            objs = spawner.batch_create_object(*[_copy(params) for _ in range(count)])
+        else:
+            objs = spawner.spawn(*[self._resolve(prototype)] * count)
+        return _place(objs, location)
+
+    # endregion
+
+    # region private methods
+    def _key(self, prototype) -> str:
+        """The cache key of a prototype key or dictionary"""
+        if isinstance(prototype, str):
+            return prototype.lower()
+        return str(prototype.get("prototype_key", "")).lower() or None
+
+    def _params(self, prototype):
+        """The cached creation arguments of a prototype, if it has any"""
+        key = self._key(prototype)
+        if key not in self.params:
+            return None
+        if not isinstance(prototype, str):
+            # a stored copy may be older than the module prototype
+            if protlib.homogenize_prototype(dict(prototype)) != self.sources[key]:
+                return None
+        return self.params[key]
+
+    def _resolve(self, prototype):
+        """The flattened prototype to give the spawner, or the prototype as it is"""
+        if isinstance(prototype, str):
+            return dict(self.prototypes.get(prototype.lower(), {})) or prototype
+        return prototype
+
+    # endregion
+
+
+def is_fixed(value) -> bool:
+    """Checks if a prototype value is the same for every spawn: no callables or protfuncs."""
+    if callable(value):
+        return False
+    if isinstance(value, str):
+        return "$" not in value
+    if isinstance(value, dict):
+        return all(is_fixed(val) for val in value.values())
+    if isinstance(value, (list, tuple, set)):
+        return all(is_fixed(val) for val in value)
+    return True
+
+
+def _copy(params: tuple) -> tuple:
+    """A copy of creation arguments, so the cached ones are never touched"""
+    create_kwargs, permissions, locks, aliases, nattributes, attributes, tags, execs = params
+    return (
+        dict(create_kwargs),
+        list(permissions),
+        locks,
+        list(aliases),
+        dict(nattributes),
+        list(attributes),
+        list(tags),
+        list(execs),
+    )
+
+
+def _place(objs: list, location) -> list:
+    """Quietly moves new objects to a location"""
+    if location:
+        for obj in objs:
+            obj.move_to(location, quiet=True)
+    return objs
+
+
+SPAWNS = SpawnCache()
@@ -0,0 +1,215 @@
+"""
+Ticks
+
+The buff tick service. Instead of every ticking buff keeping its own persistent timer,
+ticking buffs join a bucket for their tickrate, and each bucket ticks all its buffs in
+one pass per interval. A raid full of poisoned targets costs one timer per tickrate,
+not one per target.
+
+During a pass, damage dealt through `BUFF_TICKS.injure` is added up and applied once
+per target and attacker when the pass ends, and room output is deferred so each
+room gets one message per recipient.
+
+A buff's first periodic tick lands on the first pass at least half an interval after
+it was applied, so ticks can come up to half an interval early or late compared to a
+timer of its own.
+
+Buffs tick here if they are `BaseBuffExtended` and held by a `BuffHandlerExtended`,
+which registers them on add and unpause (see `components/buffsextended.py`). Buckets
+are in memory only; handlers register their ticking buffs again when they load.
+
+Buffs which only need to know how many ticks have passed can set `lazytick` instead,
+and skip this service entirely; their ticks are worked out when their handler is
+next used.
+
+```python
+from world.ticks import BUFF_TICKS
+
+def at_tick(self, initial=True, *args, **kwargs):
+    BUFF_TICKS.injure(self.owner, 5, attacker=self.source)
+```
+"""
+import time
+from twisted.internet import task
+from evennia.utils import logger
+from components.owner import OwnerRef
+from world.output import defer
+
+
+class TickService(object):
+    """
+    Ticking buffs, bucketed by tickrate.
+
+    Attrs:
+        buckets:    Ticking buffs by (owner id, handler dbkey, buff key), by tickrate.
+                    Each entry is a list of [owner ref, handler dbkey, buff key, last tick]
+        loops:      The looping call running each bucket, by tickrate
+    """
+
+    def __init__(self) -> None:
+        self.buckets = {}
+        self.loops = {}
+        self._damage = None
+
+    def __len__(self):
+        return sum(len(bucket) for bucket in self.buckets.values())
+
+    # region methods
+    def add(self, handler, buffkey: str, tickrate: int):
+        """
+        Starts ticking a buff. Ticks it once right away, like the buff contrib does
+        when a buff is applied. Re-adding a buff restarts its tick interval.
+
+        Args:
+            handler:    The buff handler holding the buff
+            buffkey:    The buff's key in the handler
+            tickrate:   How often the buff ticks, in seconds
+        """
+        tickrate = max(1, int(tickrate))
+        owner = handler.owner
+        key = (owner.id, handler.dbkey, buffkey)
+        self.remove(handler, buffkey)
+        bucket = self.buckets.setdefault(tickrate, {})
+        bucket[key] = [OwnerRef(owner), handler.dbkey, buffkey, time.time()]
+        self._start(tickrate)
+
+        buff = handler.get(buffkey)
+        if buff and buff.conditional():
+            buff.at_tick(True)
+
+    def remove(self, handler, buffkey: str):
+        """Stops ticking a buff."""
+        key = (handler.owner.id, handler.dbkey, buffkey)
+        for bucket in self.buckets.values():
+            bucket.pop(key, None)
+
+    def last_tick(self, handler, buffkey: str) -> float:
+        """Returns the time a buff last ticked, or None if it isn't ticking here."""
+        key = (handler.owner.id, handler.dbkey, buffkey)
+        for bucket in self.buckets.values():
+            if key in bucket:
+                return bucket[key][3]
+        return None
+
+    def resume(self, handler, buffkey: str, tickrate: int, prevtick: float):
+        """
+        Starts ticking a buff again after a pause or reload, without an initial tick.
+
+        Args:
+            handler:    The buff handler holding the buff
+            buffkey:    The buff's key in the handler
+            tickrate:   How often the buff ticks, in seconds
+            prevtick:   When the buff last ticked
+        """
+        tickrate = max(1, int(tickrate))
+        key = (handler.owner.id, handler.dbkey, buffkey)
+        self.remove(handler, buffkey)
+        bucket = self.buckets.setdefault(tickrate, {})
+        bucket[key] = [OwnerRef(handler.owner), handler.dbkey, buffkey, prevtick]
+        self._start(tickrate)
+
+    def injure(self, target, damage, attacker=None, element: str = "neutral"):
+        """
+        Deals tick damage. During a pass, damage to the same target from the same
+        attacker is added up and dealt once when the pass ends.
+
+        Args:
+            target:     The object to damage
+            damage:     How much damage to deal. Not modified by buffs
+            attacker:   (optional) Who the damage is from
+            element:    (default: "neutral") The damage element
+        """
+        if self._damage is None:
+            target.combat.injure(damage, attacker, element, buffcheck=False, is_event=False)
+            return
+        key = (target.id, attacker.id if attacker else None, element)
+        pending = self._damage.get(key)
+        if pending:
+            pending[3] += damage
+        else:
+            self._damage[key] = [target, attacker, element, damage]
+
+    def run(self, tickrate: int):
+        """Ticks every buff in a bucket once."""
+        bucket = self.buckets.get(tickrate)
+        if not bucket:
+            self._stop(tickrate)
+            return
+        now = time.time()
+        self._damage = {}
+        try:
+            for key, entry in list(bucket.items()):
+                try:
+                    if not self._tick(entry, tickrate, now):
+                        bucket.pop(key, None)
+                except Exception:
+                    bucket.pop(key, None)
+                    logger.log_trace("Buff tick failed for %s." % (key,))
+        finally:
+            damage, self._damage = self._damage, None
+            for target, attacker, element, total in damage.values():
+                if target.pk:
+                    self.injure(target, total, attacker, element)
+
+    def stop(self):
+        """Stops all buckets. Called at shutdown."""
+        for tickrate in list(self.loops):
+            self._stop(tickrate)
+
+    # endregion
+
+    # region private methods
+    def _tick(self, entry: list, tickrate: int, now: float) -> bool:
+        """Ticks one buff. Returns False if it's done ticking"""
+        owner = entry[0]()
+        handler = getattr(owner, entry[1], None) if owner else None
+        buffkey = entry[2]
+        if not handler or buffkey not in handler.buffcache:
+            return False
+        if now - entry[3] < tickrate / 2:
+            # only just applied; tick on the next pass
+            return True
+        buff = handler.get(buffkey)
+        if buff.paused:
+            return False
+        entry[3] = now
+
+        room = _room(owner)
+        if room:
+            defer(room)
+        if not buff.conditional():
+            return True
+        buff.at_tick(False)
+
+        # tick one last time, then expire
+        if buff.duration > -1 and buff.duration <= now - buff.start:
+            buff.remove(expire=True)
+            return False
+        return True
+
+    def _start(self, tickrate: int):
+        """Starts a bucket's looping call, if it isn't running"""
+        loop = self.loops.get(tickrate)
+        if loop and loop.running:
+            return
+        loop = self.loops[tickrate] = task.LoopingCall(self.run, tickrate)
+        loop.start(tickrate, now=False)
+
+    def _stop(self, tickrate: int):
+        """Stops a bucket's looping call"""
+        loop = self.loops.pop(tickrate, None)
+        if loop and loop.running:
+            loop.stop()
+
+    # endregion
+
+
+def _room(obj):
+    """The room an object is in, even if it's held"""
+    room = obj.location
+    while room and room.location:
+        room = room.location
+    return room
+
+
+BUFF_TICKS = TickService()
@@ -0,0 +1,260 @@
+"""
+Timers
+
+A single hierarchical timing wheel which owns the game's timers (cooldown expiry,
+revives and so on), instead of every timer scheduling its own reactor
+call and, if persistent, its own pickled task.
+
+Each level of the wheel is a ring of slots. The lowest level holds timers due within
+one rotation; higher levels hold timers further out, and cascade them down a level
+as their slot comes around. Scheduling and cancelling are O(1).
+
+Persistent timers are saved as one compact snapshot of (key, due, callback, args)
+rows, rather than one pickled task per timer. The service is started and stopped
+from `server/conf/at_server_startstop.py`.
+
+Usage:
+
+```python
+from world.timers import TIMERS
+
+TIMERS.schedule(10, _revive, obj, key="revive:" + obj.dbref)
+TIMERS.cancel("revive:" + obj.dbref)
+```
+
+Callbacks must be module-level functions, and args should be picklable game
+objects or literals, so that the timer can be restored after a restart.
+"""
+import math
+import time
+from twisted.internet import task
+from evennia.server.models import ServerConfig
+from evennia.utils import logger
+from evennia.utils.utils import variable_from_module
+
+RESOLUTION = 0.25
+"""The length of one tick, in seconds"""
+SLOTS = 64
+"""Slots per wheel level"""
+LEVELS = 4
+"""Number of wheel levels. Timers further out than SLOTS ** LEVELS ticks go in the overflow"""
+SNAPSHOT_KEY = "timing_wheel"
+SNAPSHOT_INTERVAL = 30
+"""How often, in seconds, the persistent timers are snapshotted while running"""
+
+
+class Timer(object):
+    """A single scheduled callback on the wheel"""
+
+    __slots__ = ("key", "due", "tick", "callback", "args", "persistent")
+
+    def __init__(self, key, due, callback, args=(), persistent=True) -> None:
+        self.key = key
+        self.due = due
+        self.tick = 0
+        self.callback = callback
+        self.args = tuple(args)
+        self.persistent = persistent
+
+
+class TimingWheel(object):
+    """
+    A hierarchical timing wheel, ticked by a single reactor loop.
+
+    Attrs:
+        resolution: The length of one tick, in seconds
+        slots:      The number of slots per level
+        levels:     The number of levels
+        timers:     A dictionary of all active timers, by key
+    """
+
+    def __init__(self, resolution=RESOLUTION, slots=SLOTS, levels=LEVELS) -> None:
+        self.resolution = resolution
+        self.slots = slots
+        self.levels = levels
+        self.wheels = [[[] for _ in range(slots)] for _ in range(levels)]
+        self.overflow = []
+        self.timers = {}
+        self.tick = int(time.time() / resolution)
+        self._counter = 0
+        self._changed = False
+        self._lastsave = time.time()
+        self._loop = None
+
+    # region methods
+    def schedule(
+        self, delay, callback, *args, key: str = None, persistent: bool = True
+    ) -> str:
+        """
+        Schedules a callback. Replaces any existing timer with the same key.
+
+        Args:
+            delay:      The delay in seconds
+            callback:   A module-level function to call
+            *args:      Arguments to call the function with
+            key:        (optional) A unique key for this timer; used to cancel or replace it
+            persistent: (default: True) Whether this timer survives a server restart
+
+        Returns the timer key.
+        """
+        if not key:
+            self._counter += 1
+            key = "timer-%i" % self._counter
+        self.cancel(key)
+
+        timer = Timer(key, time.time() + max(0, delay), callback, args, persistent)
+        timer.tick = max(math.ceil(timer.due / self.resolution), self.tick + 1)
+        self.timers[key] = timer
+        self._insert(timer)
+        if persistent:
+            self._changed = True
+        return key
+
+    def cancel(self, key: str):
+        """Cancels the timer with the matching key, if there is one."""
+        timer = self.timers.pop(key, None)
+        if timer and timer.persistent:
+            self._changed = True
+
+    def has(self, key: str) -> bool:
+        """Checks if a timer with the matching key is scheduled."""
+        return key in self.timers
+
+    def remaining(self, key: str) -> float:
+        """Returns the time left on the matching timer, or 0 if there is none."""
+        timer = self.timers.get(key)
+        if not timer:
+            return 0
+        return max(0, timer.due - time.time())
+
+    def advance(self, now: float = None):
+        """Advances the wheel to the current time, firing all timers that came due."""
+        target = int((now or time.time()) / self.resolution)
+        if target - self.tick > self.slots:
+            # a long stall; cheaper to rebuild than to walk every tick
+            self._rebuild(target)
+        while self.tick < target:
+            self.tick += 1
+            self._cascade()
+            self._fire()
+
+        if self._changed and time.time() - self._lastsave > SNAPSHOT_INTERVAL:
+            self.save()
+
+    def start(self):
+        """Restores the last snapshot and starts ticking."""
+        self.restore()
+        if self._loop and self._loop.running:
+            return
+        self._loop = task.LoopingCall(self.advance)
+        self._loop.start(self.resolution, now=False)
+
+    def stop(self):
+        """Stops ticking and snapshots all persistent timers."""
+        if self._loop and self._loop.running:
+            self._loop.stop()
+        self.save()
+
+    def save(self):
+        """Saves a snapshot of all persistent timers."""
+        rows = [
+            (t.key, t.due, _callback_path(t.callback), t.args)
+            for t in self.timers.values()
+            if t.persistent
+        ]
+        ServerConfig.objects.conf(SNAPSHOT_KEY, value=rows)
+        self._changed = False
+        self._lastsave = time.time()
+
+    def restore(self):
+        """Loads the last snapshot. Timers that came due while the server was down fire on the next tick.
+        Keys that were already scheduled since startup take precedence over the snapshot."""
+        rows = ServerConfig.objects.conf(SNAPSHOT_KEY, default=None)
+        if not rows:
+            return
+        now = time.time()
+        for key, due, path, args in rows:
+            if key in self.timers:
+                continue
+            callback = _resolve_callback(path)
+            if not callback:
+                logger.log_err("Timer %s: could not find callback %s" % (key, path))
+                continue
+            self.schedule(max(0, due - now), callback, *args, key=key)
+
+    # endregion
+
+    # region private methods
+    def _insert(self, timer: Timer):
+        """Places a timer in the slot for its due tick."""
+        timer.tick = max(timer.tick, self.tick)
+        delta = timer.tick - self.tick
+        span = 1
+        for level in range(self.levels):
+            if delta < span * self.slots:
+                slot = (timer.tick // span) % self.slots
+                self.wheels[level][slot].append(timer)
+                return
+            span *= self.slots
+        self.overflow.append(timer)
+
+    def _cascade(self):
+        """Moves timers from higher levels down, as their slots come around."""
+        tick = self.tick
+        for level in reversed(range(1, self.levels + 1)):
+            span = self.slots**level
+            if tick % span:
+                continue
+            if level == self.levels:
+                bucket, self.overflow = self.overflow, []
+            else:
+                slot = (tick // span) % self.slots
+                bucket = self.wheels[level][slot]
+                self.wheels[level][slot] = []
+            for timer in bucket:
+                if self.timers.get(timer.key) is timer:
+                    self._insert(timer)
+
+    def _fire(self):
+        """Calls all timers in the current lowest-level slot."""
+        slot = self.tick % self.slots
+        bucket = self.wheels[0][slot]
+        if not bucket:
+            return
+        self.wheels[0][slot] = []
+        for timer in bucket:
+            # skip cancelled or replaced timers
+            if self.timers.get(timer.key) is not timer:
+                continue
+            del self.timers[timer.key]
+            if timer.persistent:
+                self._changed = True
+            try:
+                timer.callback(*timer.args)
+            except Exception:
+                logger.log_trace("Timer %s failed." % timer.key)
+
+    def _rebuild(self, target: int):
+        """Jumps the wheel to the target tick, re-placing all active timers."""
+        self.wheels = [[[] for _ in range(self.slots)] for _ in range(self.levels)]
+        self.overflow = []
+        self.tick = target - 1
+        for timer in self.timers.values():
+            timer.tick = max(timer.tick, target)
+            self._insert(timer)
+
+    # endregion
+
+
+def _callback_path(callback) -> str:
+    """The python path of a module-level function"""
+    return "%s.%s" % (callback.__module__, callback.__qualname__)
+
+
+def _resolve_callback(path: str):
+    """Finds a module-level function from its python path"""
+    module, _, name = path.rpartition(".")
+    return variable_from_module(module, name)
+
+
+TIMERS = TimingWheel()